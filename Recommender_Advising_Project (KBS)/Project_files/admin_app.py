@@ -2,11 +2,12 @@ import streamlit as st
 import pandas as pd
 import os
 import time
+from course_store import get_course_store
+from knowledge_base import get_knowledge_base
 
-# Performance optimization: Cache data loading with TTL
-@st.cache_data(ttl=1)  # Cache expires after 1 second
+# The shared knowledge base is the catalog cache: it reloads only when the catalog version changes
 def load_courses():
-    return pd.read_csv('Courses.csv')
+    return get_knowledge_base().get_all_courses()
 
 # Initialize session state for admin login
 if 'admin_logged_in' not in st.session_state:
@@ -20,11 +21,17 @@ if 'action' not in st.session_state:
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "admin123"
 
-def save_courses(courses_df: pd.DataFrame):
-    """Save courses and clear cache"""
-    courses_df.to_csv('Courses.csv', index=False)
-    # Clear the cache to force reload
-    st.cache_data.clear()
+def add_course(course: dict) -> bool:
+    """Add a new course; False if its code is already in the catalog"""
+    return get_course_store().add_course(course) is not None
+
+def save_course(course: dict):
+    """Update (or add) one course; the new catalog version invalidates catalog caches"""
+    get_course_store().upsert_course(course)
+
+def remove_course(code: str):
+    """Delete one course; the new catalog version invalidates catalog caches"""
+    get_course_store().delete_course(code)
 
 def show_admin_login():
     st.title("Admin Login")
@@ -56,6 +63,10 @@ def show_admin_dashboard():
     if st.session_state.action == "View Courses":
         st.header("Current Courses")
         st.dataframe(courses_df)
+
+        # Warn about prerequisite loops, which make the courses involved impossible to take
+        for cycle in get_knowledge_base().prerequisite_graph.cycles:
+            st.warning(f"Prerequisite cycle detected between: {', '.join(cycle)}")
         
         # Show success message if coming from edit
         if st.session_state.show_success:
@@ -81,18 +92,18 @@ def show_admin_dashboard():
                 st.error("Please fill in all required fields!")
                 return
                 
-            new_course = pd.DataFrame({
-                'Code': [code],
-                'Course Name': [name],
-                'Description': [description],
-                'prerequisite': [prerequisites],
-                'Co-requisites': [corequisites],
-                'CH': [credit_hours],
-                'Semester Offered': [semester]
+            added = add_course({
+                'Code': code,
+                'Course Name': name,
+                'Description': description,
+                'prerequisite': prerequisites,
+                'Co-requisites': corequisites,
+                'CH': credit_hours,
+                'Semester Offered': semester
             })
-            
-            courses_df = pd.concat([courses_df, new_course], ignore_index=True)
-            save_courses(courses_df)
+            if not added:
+                st.error(f"Course {code} already exists! Use Edit Course to change it.")
+                return
             st.success("Course added successfully!")
             time.sleep(1)
             st.session_state.action = "View Courses"
@@ -129,14 +140,15 @@ def show_admin_dashboard():
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("Save Changes"):
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'Course Name'] = name
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'Description'] = description
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'prerequisite'] = prerequisites
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'Co-requisites'] = corequisites
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'CH'] = credit_hours
-                    courses_df.loc[courses_df['Code'] == course_to_edit, 'Semester Offered'] = semester
-                    
-                    save_courses(courses_df)
+                    save_course({
+                        'Code': course_to_edit,
+                        'Course Name': name,
+                        'Description': description,
+                        'prerequisite': prerequisites,
+                        'Co-requisites': corequisites,
+                        'CH': credit_hours,
+                        'Semester Offered': semester
+                    })
                     st.session_state.show_success = True
                     st.session_state.action = "View Courses"
                     st.experimental_rerun()
@@ -152,8 +164,7 @@ def show_admin_dashboard():
         course_to_delete = st.selectbox("Select Course to Delete", courses_df['Code'].tolist())
         
         if st.button("Delete Course"):
-            courses_df = courses_df[courses_df['Code'] != course_to_delete]
-            save_courses(courses_df)
+            remove_course(course_to_delete)
             st.success(f"Course {course_to_delete} deleted successfully!")
             time.sleep(1)
             st.session_state.action = "View Courses"
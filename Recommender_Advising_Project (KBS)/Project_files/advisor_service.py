@@ -0,0 +1,297 @@
+"""Headless HTTP/JSON service for course recommendations.
+
+Run from this directory:
+
+    python advisor_service.py --port 8080 --workers 4
+
+Endpoints:
+
+    GET  /health
+    GET  /catalog                 every course in catalog order
+    GET  /catalog/<code>          one course
+    GET  /metrics                 timings and counters (with ADVISOR_INSTRUMENTATION=1)
+    POST /recommendations         {"semester", "cgpa", "passed_courses", "failed_courses", "optimize"}
+    POST /explanations            same body; the result also carries the explanation texts
+
+Recommendation responses are RecommendationResult.to_dict() objects: the
+recommended codes, credit totals and one record per course.
+
+Rule evaluation runs in a process pool whose workers each keep a loaded
+KnowledgeBase. Requests that arrive within a few milliseconds of each other
+are sent to a worker as one batch. Connections are kept alive (HTTP/1.1)
+until the client closes them or they sit idle for KEEP_ALIVE_TIMEOUT;
+headers and body must each arrive within REQUEST_TIMEOUT. SIGTERM or
+SIGINT closes the listener and shuts the worker pool down.
+Only the standard library is used; put a reverse proxy in front for TLS.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import instrumentation
+from knowledge_base import KnowledgeBase, get_knowledge_base
+
+KEEP_ALIVE_TIMEOUT = 15.0
+REQUEST_TIMEOUT = 30.0
+MAX_BODY_BYTES = 1 << 20
+
+logger = logging.getLogger('advisor.service')
+
+class BadRequest(Exception):
+    pass
+
+def _parse_profile(body: bytes) -> Dict:
+    """Validate a recommendation request body"""
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise BadRequest("Body is not valid JSON")
+    if not isinstance(data, dict):
+        raise BadRequest("Body must be a JSON object")
+    semester = data.get('semester')
+    if semester not in ('FALL', 'SPRING'):
+        raise BadRequest("semester must be FALL or SPRING")
+    cgpa = data.get('cgpa')
+    if isinstance(cgpa, bool) or not isinstance(cgpa, (int, float)):
+        raise BadRequest("cgpa must be a number")
+    profile = {'semester': semester, 'cgpa': float(cgpa), 'optimize': bool(data.get('optimize', False))}
+    for field in ('passed_courses', 'failed_courses'):
+        codes = data.get(field, [])
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise BadRequest(f"{field} must be a list of course codes")
+        profile[field] = codes
+    return profile
+
+def course_json(kb: KnowledgeBase, code: str) -> Dict:
+    record = kb.get_course_record(code)
+    return {
+        'code': record.code,
+        'name': record.name,
+        'description': record.description,
+        'prerequisites': list(record.prerequisites),
+        'corequisites': list(record.corequisites),
+        'credit_hours': record.credit_hours,
+        'semester_offered': record.semester_offered,
+    }
+
+# --- Worker process side ---
+
+def _init_worker():
+    # Load the catalog once per worker instead of on its first request
+    get_knowledge_base()
+
+def _advise_batch(jobs: List[Tuple[Dict, bool]]) -> Tuple[List[Dict], List[Dict]]:
+    """Run one batch of (profile, with_explanations) jobs in a worker
+
+    Returns the results and the worker's instrumentation records, which the
+    parent process aggregates for /metrics.
+    """
+    from inference_engine import get_recommendation_result
+
+    results = []
+    for profile, with_explanations in jobs:
+        try:
+            result = get_recommendation_result(**profile)
+        except Exception as e:  # One bad profile must not fail the whole batch
+            results.append({'error': str(e)})
+            continue
+        results.append(result.to_dict(explain=with_explanations))
+    return results, instrumentation.take_records()
+
+# --- Event loop side ---
+
+class _Batcher:
+    """Collects jobs for up to max_delay seconds (or max_batch jobs) and runs them as one pool task"""
+
+    def __init__(self, executor, max_batch: int, max_delay: float):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Tuple[Dict, bool], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def run(self, job: Tuple[Dict, bool]) -> Dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((job, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            task = loop.run_in_executor(self.executor, _advise_batch, [job for job, _ in batch])
+        except Exception as error:  # e.g. BrokenProcessPool raised by submit itself
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        def deliver(task):
+            error = RuntimeError("Batch was cancelled") if task.cancelled() else task.exception()
+            if error is None:
+                results, records = task.result()
+                for record in records:
+                    instrumentation.add_record(record)
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+        task.add_done_callback(deliver)
+
+class AdvisorService:
+    def __init__(self, workers: Optional[int] = None, max_batch: int = 32, max_delay: float = 0.002):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self.batcher = _Batcher(self.executor, max_batch, max_delay)
+        self._catalog_cache: Tuple[Optional[int], bytes] = (None, b'')
+
+    def catalog_body(self) -> bytes:
+        """Encoded /catalog response, rebuilt only when the catalog version changes"""
+        kb = get_knowledge_base()
+        version, body = self._catalog_cache
+        if version != kb.version:
+            body = json.dumps([course_json(kb, code) for code in kb.get_course_codes()]).encode('utf-8')
+            self._catalog_cache = (kb.version, body)
+        return body
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, bytes]:
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, b'{"status": "ok"}'
+        if path == '/metrics' and method == 'GET':
+            return HTTPStatus.OK, json.dumps(instrumentation.snapshot()).encode('utf-8')
+        if path == '/catalog' and method == 'GET':
+            return HTTPStatus.OK, self.catalog_body()
+        if path.startswith('/catalog/') and method == 'GET':
+            kb = get_knowledge_base()
+            code = unquote(path[len('/catalog/'):])
+            if kb.get_course_record(code) is None:
+                return HTTPStatus.NOT_FOUND, _error(f"Unknown course {code}")
+            return HTTPStatus.OK, json.dumps(course_json(kb, code)).encode('utf-8')
+        if path in ('/recommendations', '/explanations'):
+            if method != 'POST':
+                return HTTPStatus.METHOD_NOT_ALLOWED, _error("Use POST")
+            try:
+                profile = _parse_profile(body)
+            except BadRequest as e:
+                return HTTPStatus.BAD_REQUEST, _error(str(e))
+            result = await self.batcher.run((profile, path == '/explanations'))
+            status = HTTPStatus.INTERNAL_SERVER_ERROR if 'error' in result else HTTPStatus.OK
+            return status, json.dumps(result).encode('utf-8')
+        return HTTPStatus.NOT_FOUND, _error("Not found")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                try:
+                    headers = await asyncio.wait_for(_read_headers(reader), REQUEST_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _error("Body too large"), False
+                else:
+                    try:
+                        body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b''
+                    except asyncio.TimeoutError:
+                        break
+                    path = target.split('?', 1)[0]
+                    try:
+                        status, payload = await self.dispatch(method, path, body)
+                    except Exception:  # e.g. a broken worker pool; answer instead of dropping the connection
+                        logger.exception("%s %s failed", method, path)
+                        status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, _error("Internal server error")
+
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Malformed request or client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        # Start the workers (and load their catalogs) before the first request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _advise_batch, [])
+                               for _ in range(self.workers)))
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Advisor service listening on http://{host}:{port}")
+        # Stop on SIGTERM/SIGINT and shut the pool down, so the workers never outlive the service
+        stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except NotImplementedError:
+                pass  # Windows: Ctrl+C still arrives as KeyboardInterrupt in main()
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            self.executor.shutdown()
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+def _error(message: str) -> bytes:
+    return json.dumps({'error': message}).encode('utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description="Course advisor HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    service = AdvisorService(args.workers, args.max_batch, args.max_delay_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown()
+
+if __name__ == "__main__":
+    main()
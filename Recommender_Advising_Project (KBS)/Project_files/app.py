@@ -1,28 +1,32 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image
-import json
-import os
 import base64
-import requests
-from inference_engine import get_course_recommendations
-from knowledge_base import KnowledgeBase
-from typing import List, Set
-
-# Performance optimization: Cache data loading
-def load_users():
-    if os.path.exists('users.json'):
-        with open('users.json', 'r') as f:
-            return json.load(f)
-    return {}
+import threading
+# experta (inference_engine), requests and streamlit_lottie are imported by the pages that use them
+from knowledge_base import get_knowledge_base
+from user_store import get_user_store
+from typing import Dict, List, Set
 
-@st.cache_data
 def load_courses():
-    return pd.read_csv('Courses.csv')
+    # Versioned by the shared knowledge base, so a Streamlit cache is not needed
+    return get_knowledge_base().get_all_courses()
+
+def _prewarm():
+    # Import experta and build the catalog and one engine while the user is still on the welcome page
+    from inference_engine import prewarm
+    prewarm()
+
+@st.cache_resource
+def start_prewarm() -> threading.Thread:
+    """Prewarm once per server process, in the background"""
+    thread = threading.Thread(target=_prewarm, name='advisor-prewarm', daemon=True)
+    thread.start()
+    return thread
 
 @st.cache_data
 def load_lottie_url(url: str):
     try:
+        import requests
         r = requests.get(url)
         if r.status_code != 200:
             return None
@@ -36,14 +40,6 @@ if 'page' not in st.session_state:
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
-def save_users(users):
-    with open('users.json', 'w') as f:
-        json.dump(users, f)
-
-# Initialize users if not exists
-if not os.path.exists('users.json'):
-    save_users({})
-
 # Page config with improved performance settings
 st.set_page_config(
     page_title="AIU CSE Course Advisor",
@@ -514,14 +510,15 @@ def show_advisor_interface():
     cgpa = st.number_input("Enter your CGPA", min_value=0.000, max_value=4.000, value=2.000, step=0.001, format="%.3f")
     
     # Get all courses for multiselect
-    kb = KnowledgeBase()
-    all_courses = kb.get_all_courses()
-    course_codes = all_courses['Code'].tolist()
+    kb = get_knowledge_base()
+    course_codes = list(kb.get_course_codes())
     
     passed_courses = st.multiselect("Select Passed Courses", course_codes)
     failed_courses = st.multiselect("Select Failed Courses", course_codes)
     
     if st.button("Get Recommendations"):
+        from inference_engine import get_course_recommendations
+
         recommendations, explanations, total_credits = get_course_recommendations(
             semester, cgpa, passed_courses, failed_courses
         )
@@ -593,8 +590,7 @@ def show_login():
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("🚪 Login", key="login_submit", use_container_width=True):
-                    users = load_users()
-                    if student_id in users and users[student_id]['password'] == password:
+                    if get_user_store().authenticate(student_id, password):
                         st.session_state.logged_in = True
                         st.session_state.student_id = student_id
                         st.session_state.page = 'dashboard'
@@ -687,8 +683,7 @@ def show_signup():
                         """, unsafe_allow_html=True)
                         return
                         
-                    users = load_users()
-                    if student_id in users:
+                    if not get_user_store().add_user(student_id, email, password):
                         st.markdown("""
                             <div class="warning-message fade-in">
                                 ❌ Student ID already exists!
@@ -696,11 +691,6 @@ def show_signup():
                         """, unsafe_allow_html=True)
                         return
                         
-                    users[student_id] = {
-                        'email': email,
-                        'password': password
-                    }
-                    save_users(users)
                     st.markdown("""
                         <div class="success-message fade-in">
                             ✅ Registration successful! Please login.
@@ -731,13 +721,12 @@ def show_signup():
                 </div>
             """, unsafe_allow_html=True)
 
-def show_course_details(course_code: str, course_data: dict, courses_df: pd.DataFrame):
-    """Display detailed information about a course"""
-    course = courses_df[courses_df['Code'] == course_code].iloc[0]
+def show_course_details(course, course_data: Dict[str, str]):
+    """Display detailed information about a RecommendedCourse"""
     
-    with st.expander(f"📚 {course_code} - {course['Course Name']}"):
-        st.write(f"**Description:** {course['Description']}")
-        st.write(f"**Credit Hours:** {course['CH']}")
+    with st.expander(f"📚 {course.code} - {course.name}"):
+        st.write(f"**Description:** {course.description}")
+        st.write(f"**Credit Hours:** {course.credit_hours}")
         
         # Display explanations
         if course_data['failed_priority']:
@@ -752,11 +741,26 @@ def show_course_details(course_code: str, course_data: dict, courses_df: pd.Data
         st.write("**Semester Availability:**")
         st.write(course_data['semester'])
 
+def show_what_if(session, semester: str, cgpa: float, passed_courses: List[str], failed_courses: List[str]):
+    """Show how the latest recommendations change with the current course selections"""
+    from what_if import WhatIfSession
+
+    if session.semester != semester or session.cgpa != cgpa or session.kb is not get_knowledge_base():
+        session = st.session_state.what_if = WhatIfSession(semester, cgpa, passed_courses, failed_courses)
+    delta = session.update(passed_courses, failed_courses)
+
+    st.header("What-if Recommendations")
+    if delta.added:
+        st.success(f"Now recommended: {', '.join(delta.added)}")
+    if delta.removed:
+        st.warning(f"No longer recommended: {', '.join(delta.removed)}")
+    st.write(f"**Recommended:** {', '.join(delta.recommended) or 'none'} ({delta.total_credits} credit hours)")
+
 def show_dashboard():
     st.title("Student Dashboard")
     
-    # Load courses data
-    courses_df = pd.read_csv('Courses.csv')
+    # Code-indexed catalog of the current version; no DataFrame scans on reruns
+    kb = get_knowledge_base()
     
     # Input fields
     st.header("Enter Your Information")
@@ -764,49 +768,62 @@ def show_dashboard():
     cgpa = st.number_input("CGPA", min_value=0.000, max_value=4.000, value=2.000, step=0.001, format="%.3f")
     
     # Multi-select for passed and failed courses
-    all_courses = courses_df['Code'].tolist()
+    all_courses = list(kb.get_course_codes())
     passed_courses = st.multiselect("Select Passed Courses", all_courses)
     failed_courses = st.multiselect("Select Failed Courses", all_courses)
     
     if st.button("Get Recommendations"):
-        from inference_engine import get_course_recommendations
+        from inference_engine import get_recommendation_result
+        from what_if import WhatIfSession
         
-        recommendations, explanations, total_credits = get_course_recommendations(
+        # Later edits to the course selections are answered incrementally by this session
+        st.session_state.what_if = WhatIfSession(semester, cgpa, passed_courses, failed_courses)
+        result = get_recommendation_result(
             semester=semester,
             cgpa=cgpa,
             passed_courses=passed_courses,
-            failed_courses=failed_courses
+            failed_courses=failed_courses,
+            kb=kb
         )
         
         # Display credit limit explanation
-        st.info(explanations['credit_limit'])
+        st.info(result.explanations['credit_limit'])
         
-        if recommendations:
+        if result.courses:
             st.header("Recommended Courses")
             
-            # Create a DataFrame for recommended courses
-            recommended_data = []
-            for code in recommendations:
-                course = courses_df[courses_df['Code'] == code].iloc[0]
-                recommended_data.append({
-                    'Code': code,
-                    'Course Name': course['Course Name'],
-                    'Credit Hours': course['CH']
-                })
-            
-            recommendations_df = pd.DataFrame(recommended_data)
+            # The table, total and detail expanders all come from the result's course records
+            recommendations_df = pd.DataFrame({
+                'Code': [course.code for course in result.courses],
+                'Course Name': [course.name for course in result.courses],
+                'Credit Hours': [course.credit_hours for course in result.courses],
+            })
             st.dataframe(recommendations_df)
             
-            st.write(f"**Total Credit Hours:** {total_credits}")
+            st.write(f"**Total Credit Hours:** {result.total_credits}")
             
             # Display detailed explanations for each course
             st.header("Course Details and Explanations")
-            for course_code in recommendations:
-                show_course_details(course_code, explanations['courses'][course_code], courses_df)
+            for course in result.courses:
+                show_course_details(course, result.explanation(course.code))
                 
         else:
             st.warning("No courses recommended. This could be due to credit limits, prerequisites, or semester availability.")
+    elif st.session_state.get('what_if') is not None:
+        show_what_if(st.session_state.what_if, semester, cgpa, passed_courses, failed_courses)
         
+    if st.button("Plan Path to Graduation"):
+        from degree_planner import plan_degree_path
+
+        plan = plan_degree_path(semester, cgpa, passed_courses, failed_courses)
+        st.header(f"Degree Plan ({plan.term_count} terms)")
+        for number, term in enumerate(plan.terms, start=1):
+            st.write(f"**Term {number} - {term.semester}** ({term.credit_hours} credit hours): {', '.join(term.courses)}")
+        if plan.unschedulable:
+            st.warning(f"These courses cannot be scheduled because their requirements can't be met: {', '.join(plan.unschedulable)}")
+        if plan.unplanned:
+            st.info(f"These courses did not fit in the planned terms: {', '.join(plan.unplanned)}")
+
     if st.button("Logout"):
         st.session_state.logged_in = False
         st.session_state.page = 'welcome'
@@ -814,6 +831,7 @@ def show_dashboard():
 
 # Main app logic
 def main():
+    start_prewarm()
     if st.session_state.page == 'welcome':
         show_welcome_page()
     elif st.session_state.page == 'login':
@@ -0,0 +1,389 @@
+"""Performance benchmarks for the course advisor.
+
+Run from this directory, e.g.:
+
+    python benchmark.py engine --requests 200
+    python benchmark.py parity --profiles 1000
+    python benchmark.py login --logins 50
+    python benchmark.py suite --sizes 50 500 5000 --output before.json
+    python benchmark.py compare before.json after.json
+    python benchmark.py imports
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from knowledge_base import KnowledgeBase, get_knowledge_base
+
+def random_profiles(count: int, seed: int = 0, edge_cases: bool = False, kb: KnowledgeBase = None) -> List[Dict]:
+    """Random student profiles drawn from the catalog (the shared one by default)
+
+    With edge_cases, profiles also contain unknown codes, repeated failed
+    courses and courses that are both passed and failed.
+    """
+    codes = list((kb or get_knowledge_base()).get_course_codes())
+    if edge_cases:
+        codes += ['UNKNOWN101', 'Senior Standing']
+    rnd = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        passed = rnd.sample(codes, rnd.randint(0, len(codes) // 2))
+        failed = rnd.sample(codes, rnd.randint(0, 4))
+        if edge_cases:
+            failed += rnd.sample(failed + passed, min(len(failed + passed), rnd.randint(0, 3)))
+        profiles.append({
+            'semester': rnd.choice(['FALL', 'SPRING']),
+            'cgpa': round(rnd.uniform(0, 4), 3),
+            'passed_courses': passed,
+            'failed_courses': failed,
+        })
+    return profiles
+
+def time_requests(run: Callable[[Dict], object], profiles: List[Dict]) -> Dict[str, float]:
+    """Time `run` once per profile and summarize per-request latency in milliseconds"""
+    latencies = []
+    for profile in profiles:
+        start = time.perf_counter()
+        run(profile)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+def print_timings(label: str, timings: Dict[str, float]):
+    print(f"{label:<36} " + "  ".join(f"{k}={v:8.3f}" for k, v in timings.items()))
+
+def bench_engine(args):
+    """Per-request rule evaluation latency: new engine per request, pooled engine, compiled rules"""
+    from inference_engine import AdvisorPool, CourseAdvisor, evaluate_rules_compiled
+
+    kb = get_knowledge_base()
+    profiles = random_profiles(args.requests, args.seed)
+    pool = AdvisorPool()
+
+    def fresh_engine(profile):
+        # What get_course_recommendations used to do on every click
+        CourseAdvisor(kb).advise(**profile)
+
+    def pooled_engine(profile):
+        with pool.advisor(kb) as engine:
+            engine.advise(**profile)
+
+    def compiled_rules(profile):
+        evaluate_rules_compiled(kb, profile['semester'], profile['passed_courses'], profile['failed_courses'])
+
+    before = time_requests(fresh_engine, profiles)
+    after = time_requests(pooled_engine, profiles)
+    print_timings("new engine per request", before)
+    print_timings("pooled engine", after)
+    print_timings("compiled rules", time_requests(compiled_rules, profiles))
+    print(f"pooled speedup (mean): {before['mean_ms'] / after['mean_ms']:.2f}x")
+
+def bench_parity(args):
+    """Check that the compiled rule evaluator and the batch API match the experta engine"""
+    from inference_engine import (CourseAdvisor, evaluate_rules_compiled, get_course_recommendations,
+                                  get_course_recommendations_batch)
+
+    kb = get_knowledge_base()
+    profiles = random_profiles(args.profiles, args.seed, edge_cases=True)
+    batch = get_course_recommendations_batch(pd.DataFrame(profiles))
+    engine = CourseAdvisor(kb)
+    mismatches = 0
+    for i, profile in enumerate(profiles):
+        engine.advise(**profile)
+        expected_rules = (engine.failed_recommendations, engine.regular_recommendations)
+        compiled_rules = evaluate_rules_compiled(kb, profile['semester'], profile['passed_courses'],
+                                                 profile['failed_courses'])
+        expected = get_course_recommendations(**profile, compiled=False, use_cache=False)
+        compiled = get_course_recommendations(**profile, compiled=True, use_cache=False)
+        batch_row = (list(batch['recommended_courses'][i]), int(batch['total_credits'][i]))
+        if (compiled_rules != expected_rules or compiled != expected
+                or batch_row != (expected[0], expected[2])):
+            mismatches += 1
+            print(f"profile {i} differs: {profile}")
+    print(f"{len(profiles)} profiles, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+def bench_login(args):
+    """Password verifications per second: one thread, concurrent sessions, and cached reruns"""
+    from passwords import PASSWORD_SCHEME, hash_password, verify_password
+
+    stored = hash_password('correct horse battery staple')
+    print(f"scheme: {stored.split('$', 1)[0]} ({PASSWORD_SCHEME} configured), {os.cpu_count()} core(s)")
+
+    start = time.perf_counter()
+    for _ in range(args.logins):
+        verify_password('correct horse battery staple', stored, use_cache=False)
+    single = args.logins / (time.perf_counter() - start)
+
+    # One thread per core, like Streamlit sessions logging in at once (hashlib releases the GIL)
+    cores = os.cpu_count() or 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=cores) as pool:
+        list(pool.map(lambda i: verify_password(f'guess {i}', stored), range(args.logins)))
+    concurrent = args.logins / (time.perf_counter() - start)
+
+    verify_password('correct horse battery staple', stored)
+    start = time.perf_counter()
+    for _ in range(args.logins):
+        verify_password('correct horse battery staple', stored)
+    cached = args.logins / (time.perf_counter() - start)
+
+    print(f"{'single thread':<28} {single:10.1f} logins/s")
+    print(f"{'concurrent sessions':<28} {concurrent:10.1f} logins/s ({concurrent / cores:.1f} per core)")
+    print(f"{'cached rerun':<28} {cached:10.1f} logins/s")
+
+def synthetic_catalog(course_count: int, seed: int = 0) -> pd.DataFrame:
+    """A catalog shaped like a degree program: levels of courses whose prerequisites come from lower levels
+
+    About one course in eight gets a same-level co-requisite (a lab next to
+    its lecture), so co-requisite chains are exercised too.
+    """
+    rnd = random.Random(seed)
+    level_size = max(5, course_count // 8)
+    rows = []
+    for i in range(course_count):
+        level = i // level_size
+        prerequisites = []
+        if level > 0:
+            lower = range(max(0, (level - 2) * level_size), level * level_size)
+            prerequisites = rnd.sample(lower, min(len(lower), rnd.choice([0, 1, 1, 2, 2, 3])))
+        corequisite = ''
+        if i % level_size and rnd.random() < 0.125:
+            corequisite = f'SYN{i - 1:05d}'
+        rows.append({
+            'Code': f'SYN{i:05d}',
+            'Course Name': f'Synthetic Course {i}',
+            'Description': f'Level {level} course',
+            'prerequisite': ', '.join(f'SYN{p:05d}' for p in sorted(prerequisites)),
+            'Co-requisites': corequisite,
+            'CH': rnd.choice([2, 3, 3, 3, 4]),
+            'Semester Offered': rnd.choice(['FALL', 'SPRING', 'BOTH', 'BOTH']),
+        })
+    return pd.DataFrame(rows)
+
+def synthetic_students(kb: KnowledgeBase, count: int, seed: int = 0) -> List[Dict]:
+    """Students whose passed courses respect prerequisites, with a few failed courses they were eligible for"""
+    rnd = random.Random(seed)
+    codes = kb.get_course_codes()
+    profiles = []
+    for _ in range(count):
+        progress = rnd.random()
+        passed = set()
+        for code in codes:  # Catalog order lists prerequisites first
+            if rnd.random() < progress and kb.check_prerequisites_met(code, passed):
+                passed.add(code)
+        open_courses = [code for code in codes if code not in passed and kb.check_prerequisites_met(code, passed)]
+        failed = rnd.sample(open_courses, min(len(open_courses), rnd.choice([0, 0, 1, 2, 3])))
+        profiles.append({
+            'semester': rnd.choice(['FALL', 'SPRING']),
+            'cgpa': round(rnd.uniform(1.5, 4), 2),
+            'passed_courses': sorted(passed),
+            'failed_courses': failed,
+        })
+    return profiles
+
+def time_calls(run: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Time `run` `repeat` times; latency summary in milliseconds"""
+    return time_requests(lambda _: run(), [None] * repeat)
+
+def bench_suite(args):
+    """Time KB load, KB accessors, CourseAdvisor, end-to-end recommendations and explanations on synthetic catalogs"""
+    from explanation_system import ExplanationSystem
+    from inference_engine import CourseAdvisor, get_course_recommendations
+
+    results = {}
+    for size in args.sizes:
+        print(f"--- {size} courses ---")
+        catalog = synthetic_catalog(size, args.seed)
+        timings: Dict[str, Dict[str, float]] = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'Courses.csv')
+            catalog.to_csv(csv_path, index=False)
+            timings['kb_load_csv'] = time_calls(lambda: KnowledgeBase(csv_path), args.repeat)
+            from catalog_snapshot import get_snapshot
+            from course_store import get_course_store
+            store = get_course_store(csv_path)
+            get_snapshot(store)  # Compile once, outside the timing
+            timings['kb_load_snapshot'] = time_calls(lambda: KnowledgeBase.from_snapshot(get_snapshot(store)), args.repeat)
+            store.db.connection.close()  # Let the temporary directory be removed on Windows
+        timings['kb_load_dataframe'] = time_calls(lambda: KnowledgeBase(courses_df=catalog.copy()), args.repeat)
+
+        kb = KnowledgeBase(courses_df=catalog.copy(), version=f'synthetic-{size}-{args.seed}')
+        students = synthetic_students(kb, args.students, args.seed)
+        rnd = random.Random(args.seed)
+        codes = kb.get_course_codes()
+        sample = [rnd.choice(codes) for _ in range(args.students)]
+        passed = [set(s['passed_courses']) for s in students]
+        accessors = {
+            'get_course_codes': lambda i: kb.get_course_codes(),
+            'get_course_record': lambda i: kb.get_course_record(sample[i]),
+            'get_course_by_code': lambda i: kb.get_course_by_code(sample[i]),
+            'get_prerequisites': lambda i: kb.get_prerequisites(sample[i]),
+            'get_corequisites': lambda i: kb.get_corequisites(sample[i]),
+            'get_credit_hours': lambda i: kb.get_credit_hours(sample[i]),
+            'get_semester_offered': lambda i: kb.get_semester_offered(sample[i]),
+            'get_semester_courses': lambda i: kb.get_semester_courses(students[i]['semester']),
+            'get_available_courses': lambda i: kb.get_available_courses(students[i]['semester'],
+                                                                        set(students[i]['failed_courses'])),
+            'get_eligible_courses': lambda i: kb.get_eligible_courses(students[i]['semester'], passed[i]),
+            'get_blocked_courses': lambda i: kb.get_blocked_courses(sample[i]),
+            'get_credit_limit': lambda i: kb.get_credit_limit(students[i]['cgpa']),
+            'check_prerequisites_met': lambda i: kb.check_prerequisites_met(sample[i], passed[i]),
+            'check_corequisites_available': lambda i: kb.check_corequisites_available(sample[i], passed[i], set()),
+            'is_course_available': lambda i: kb.is_course_available(sample[i], students[i]['semester'],
+                                                                    passed[i], set()),
+        }
+        for name, accessor in accessors.items():
+            timings[f'kb.{name}'] = time_requests(accessor, range(args.students))
+
+        engine = CourseAdvisor(kb)
+        timings['course_advisor_run'] = time_requests(lambda s: engine.advise(**s), students)
+        for compiled in (False, True):
+            label = 'recommendations_compiled' if compiled else 'recommendations_experta'
+            timings[label] = time_requests(
+                lambda s: get_course_recommendations(**s, compiled=compiled, use_cache=False, kb=kb), students)
+        get_course_recommendations(**students[0], kb=kb)
+        timings['recommendations_cached'] = time_requests(
+            lambda s: get_course_recommendations(**students[0], kb=kb), students)
+
+        explanation_system = ExplanationSystem(kb)
+        recommended = [get_course_recommendations(**s, compiled=True, use_cache=False, kb=kb)[0] for s in students]
+
+        def explain(i):
+            s = students[i]
+            explanations = explanation_system.get_detailed_recommendations_explanation(
+                recommended[i], s['semester'], s['cgpa'], passed[i], set(s['failed_courses']), set(recommended[i]))
+            return explanations['courses'].to_dict()
+        timings['explanations'] = time_requests(explain, range(args.students))
+
+        for name, timing in timings.items():
+            print_timings(name, timing)
+        results[str(size)] = timings
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': args.seed,
+            'students': args.students,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+def bench_compare(args):
+    """Compare two suite result files: mean latency ratio (new / old) per size and measurement"""
+    with open(args.old) as f:
+        old = json.load(f)['results']
+    with open(args.new) as f:
+        new = json.load(f)['results']
+    for size in old:
+        if size not in new:
+            continue
+        print(f"--- {size} courses ---")
+        for name, timing in old[size].items():
+            if name in new[size]:
+                before, after = timing['mean_ms'], new[size][name]['mean_ms']
+                ratio = after / before if before else float('inf')
+                print(f"{name:<40} {before:10.4f} -> {after:10.4f} ms  x{ratio:.2f}")
+
+def import_times(statement: str) -> Dict[str, float]:
+    """Cumulative import time in milliseconds per module imported by `statement`, via -X importtime
+
+    Keys keep the indentation -X importtime uses for nested imports.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name[1:]] = int(cumulative) / 1000
+    return times
+
+def bench_imports(args):
+    """Cold import time of the app's startup modules versus the modules it now loads lazily"""
+    def total_ms(run: Dict[str, float]) -> float:
+        # Nested imports are indented and already counted in their parent's cumulative time
+        return sum(ms for name, ms in run.items() if not name.startswith(' '))
+
+    # Modules the interpreter imports before running any statement
+    interpreter = min(total_ms(import_times('pass')) for _ in range(args.repeat))
+    startup = 'import knowledge_base, user_store'
+    print(f"{'statement':<40} {'total ms':>10}  heaviest modules")
+    for statement in [startup, 'import inference_engine', 'import PIL.Image', 'import requests', 'import app']:
+        try:
+            runs = [import_times(statement) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{statement:<40} {'-':>10}  not importable here ({e})")
+            continue
+        total = min(total_ms(run) for run in runs) - interpreter
+        heaviest = sorted(((name, ms) for name, ms in runs[0].items() if not name.startswith(' ')),
+                          key=lambda item: -item[1])[:3]
+        print(f"{statement:<40} {total:10.1f}  " + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest))
+    print("app.py used to import inference_engine (experta), PIL and requests at startup; "
+          "they are now imported on first use")
+
+def main():
+    parser = argparse.ArgumentParser(description="Course advisor benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    engine_parser = subparsers.add_parser('engine', help=bench_engine.__doc__)
+    engine_parser.add_argument('--requests', type=int, default=200)
+    engine_parser.add_argument('--seed', type=int, default=0)
+    engine_parser.set_defaults(func=bench_engine)
+
+    parity_parser = subparsers.add_parser('parity', help=bench_parity.__doc__)
+    parity_parser.add_argument('--profiles', type=int, default=500)
+    parity_parser.add_argument('--seed', type=int, default=0)
+    parity_parser.set_defaults(func=bench_parity)
+
+    login_parser = subparsers.add_parser('login', help=bench_login.__doc__)
+    login_parser.add_argument('--logins', type=int, default=50)
+    login_parser.set_defaults(func=bench_login)
+
+    suite_parser = subparsers.add_parser('suite', help=bench_suite.__doc__)
+    suite_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 2000, 20000])
+    suite_parser.add_argument('--students', type=int, default=20)
+    suite_parser.add_argument('--repeat', type=int, default=3, help="catalog loads per size")
+    suite_parser.add_argument('--seed', type=int, default=0)
+    suite_parser.add_argument('--output', default=None, help="write the results as JSON (for 'compare')")
+    suite_parser.set_defaults(func=bench_suite)
+
+    compare_parser = subparsers.add_parser('compare', help=bench_compare.__doc__)
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.set_defaults(func=bench_compare)
+
+    imports_parser = subparsers.add_parser('imports', help=bench_imports.__doc__)
+    imports_parser.add_argument('--repeat', type=int, default=3)
+    imports_parser.set_defaults(func=bench_imports)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
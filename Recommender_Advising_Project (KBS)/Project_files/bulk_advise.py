@@ -0,0 +1,44 @@
+"""Advise a whole file of students in parallel.
+
+    python bulk_advise.py students.csv recommendations.jsonl --workers 4 --explain
+
+Input is CSV or JSONL and output is JSONL or CSV, picked by file extension
+(see recommendation_stream.py for the formats). Output has one record per
+input student in input order. The input is streamed in fixed-size chunks,
+so memory use does not grow with the file. Progress and throughput are
+reported on stderr.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from knowledge_base import get_knowledge_base
+from recommendation_stream import RecommendationWriter, advise_stream, init_worker, read_students
+
+def main():
+    parser = argparse.ArgumentParser(description="Advise a file of students in parallel")
+    parser.add_argument('input', help="students .csv or .jsonl")
+    parser.add_argument('output', help="results .jsonl or .csv")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="students read and advised at a time")
+    parser.add_argument('--explain', action='store_true', help="add the explanation text for each student")
+    args = parser.parse_args()
+
+    # Make sure the catalog store is ready before the workers start reading it
+    get_knowledge_base()
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker) as pool, \
+            RecommendationWriter(args.output, explain=args.explain) as writer:
+        records = advise_stream(read_students(args.input), args.chunk_size, args.explain, pool)
+        for record in records:
+            writer.write(record)
+            if writer.count % 10000 == 0:
+                print(f"{writer.count} students...", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"Advised {writer.count} students in {elapsed:.2f}s "
+          f"({writer.count / elapsed if elapsed else 0:.1f} students/s, {args.workers} workers)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
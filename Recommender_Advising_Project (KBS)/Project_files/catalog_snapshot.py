@@ -0,0 +1,208 @@
+"""Compiled binary snapshots of the course catalog.
+
+Building a KnowledgeBase from the catalog rows means splitting requirement
+strings, compiling the prerequisite graph and computing the impact metrics.
+A snapshot stores all of that once per catalog version, next to the course
+store (Courses.csv -> Courses.snapshot):
+
+    python catalog_snapshot.py compile   # build it now (otherwise done on first load)
+    python catalog_snapshot.py info
+
+Layout: an 8-byte magic, a little-endian uint32 header length, a JSON
+header, then 8-byte aligned arrays. The header holds the format version,
+the store's catalog version and CSV digest, and the offset, dtype and
+length of every array. Integer columns (credit hours, requirement
+adjacency in offset/id form, dependent counts, chain lengths, ranking,
+cycles) are NumPy views into a read-only mmap. Text columns are stored as
+offset arrays over UTF-8 data.
+
+What is shared: KnowledgeBase.catalog_arrays() hands the credit-hour,
+requirement and ranking views to the NumPy batch path without copying,
+so processes that load the same snapshot share those pages. What is not:
+the per-course records and the bitset PrerequisiteGraph are still built
+as Python objects in every process. The snapshot saves the parsing,
+cycle detection and impact passes, not that memory.
+
+get_snapshot() rebuilds the file when the store's version or CSV digest
+no longer matches, i.e. after an admin edit or a change to Courses.csv.
+"""
+import argparse
+import json
+import mmap
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from course_store import COLUMNS, CourseStore, get_course_store
+
+MAGIC = b'ADVSNAP\x00'
+FORMAT_VERSION = 1
+
+def snapshot_path(store: CourseStore) -> str:
+    return os.path.splitext(store.db_path)[0] + '.snapshot'
+
+def _adjacency(lists: List[List[int]]) -> Dict[str, np.ndarray]:
+    offsets = np.zeros(len(lists) + 1, dtype='<i4')
+    offsets[1:] = np.cumsum([len(ids) for ids in lists], dtype=np.int64)
+    ids = np.array([i for ids in lists for i in ids], dtype='<i4')
+    return {'offsets': offsets, 'ids': ids}
+
+def _strings(values: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    offsets[1:] = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    return {'offsets': offsets, 'data': np.frombuffer(b''.join(encoded), dtype=np.uint8)}
+
+def write_snapshot(path: str, kb, csv_digest: str = ''):
+    """Write the compiled form of a KnowledgeBase built from a course store (atomically replacing path)"""
+    graph = kb.prerequisite_graph
+    count = graph.course_count
+    records = [kb.get_course_record(code) for code in graph.codes[:count]]
+    raw = kb.courses_df[COLUMNS].astype(object).values.tolist()
+    impacts = [kb.get_course_impact(record.code) for record in records]
+
+    arrays = {
+        'credit_hours': np.array([r.credit_hours for r in records], dtype='<i4'),
+        'dependents': np.array([i.dependents for i in impacts], dtype='<i4'),
+        'longest_chain': np.array([i.longest_chain for i in impacts], dtype='<i4'),
+        'ranked': np.array(kb.ranked_course_ids, dtype='<i4'),
+    }
+    groups = {
+        'prerequisite': _adjacency([graph.ids_of(mask) for mask in graph.prerequisite_masks]),
+        'corequisite': _adjacency([graph.ids_of(mask) for mask in graph.corequisite_masks]),
+        'cycle': _adjacency([[graph.ids[code] for code in cycle] for cycle in graph.cycles]),
+        'codes': _strings(graph.codes),
+        'names': _strings([r.name for r in records]),
+        'descriptions': _strings([r.description for r in records]),
+        'semesters': _strings([r.semester_offered for r in records]),
+        # The rows as the store returned them, for the DataFrame view; JSON keeps each value's type
+        'rows': _strings([json.dumps(row) for row in raw]),
+    }
+    for group, parts in groups.items():
+        for part, array in parts.items():
+            arrays[f'{group}_{part}'] = array
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'length': len(array)}
+        offset += -(-array.nbytes // 8) * 8
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        'version': kb.version,
+        'csv_digest': csv_digest,
+        'course_count': count,
+        'arrays': layout,
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+    data_start = len(MAGIC) + 4 + len(header)
+
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC + len(header).to_bytes(4, 'little') + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        # Windows refuses to replace a file another process still has mapped
+        os.remove(temp_path)
+        raise
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 4], 'little')
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._mmap[header_start:header_start + header_length].decode('utf-8'))
+        if header['format'] != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {header['format']}, expected {FORMAT_VERSION}")
+        self.version = header['version']
+        self.csv_digest = header['csv_digest']
+        self.course_count = header['course_count']
+        self._data_start = header_start + header_length
+        self._layout = header['arrays']
+        for name, entry in self._layout.items():
+            end = self._data_start + entry['offset'] + np.dtype(entry['dtype']).itemsize * entry['length']
+            if end > len(self._mmap):
+                raise ValueError(f"{path} is truncated (array {name})")
+
+    def array(self, name: str) -> np.ndarray:
+        """One stored array, read in place from the mapping"""
+        entry = self._layout[name]
+        return np.frombuffer(self._mmap, dtype=entry['dtype'], count=entry['length'],
+                             offset=self._data_start + entry['offset'])
+
+    def adjacency(self, group: str) -> List[List[int]]:
+        """Per-item id lists of an offsets/ids group (requirements per course, or cycles)"""
+        offsets = self.array(f'{group}_offsets').tolist()
+        ids = self.array(f'{group}_ids').tolist()
+        return [ids[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def strings(self, group: str) -> List[str]:
+        offsets = self.array(f'{group}_offsets').tolist()
+        entry = self._layout[f'{group}_data']
+        start = self._data_start + entry['offset']
+        data = self._mmap[start:start + entry['length']]
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def dataframe(self) -> pd.DataFrame:
+        """The catalog rows as KnowledgeBase.courses_df"""
+        rows = [json.loads(row) for row in self.strings('rows')]
+        return pd.DataFrame.from_records(rows, columns=COLUMNS).fillna('')
+
+def load_snapshot(path: str) -> Optional[CatalogSnapshot]:
+    """Open a snapshot file, or None if it is missing or unreadable"""
+    try:
+        return CatalogSnapshot(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def compile_snapshot(store: CourseStore) -> Optional[CatalogSnapshot]:
+    """Build the snapshot of the store's current catalog; None if the file couldn't be replaced"""
+    from knowledge_base import KnowledgeBase
+
+    csv_digest = store.csv_digest()
+    version, courses_df = store.snapshot()
+    path = snapshot_path(store)
+    try:
+        write_snapshot(path, KnowledgeBase(courses_df=courses_df, version=version), csv_digest)
+    except OSError:
+        return None
+    return load_snapshot(path)
+
+def get_snapshot(store: CourseStore, version: Optional[int] = None) -> Optional[CatalogSnapshot]:
+    """The snapshot of the store's current catalog version, compiling it if it is missing or stale"""
+    if version is None:
+        version = store.version()
+    snapshot = load_snapshot(snapshot_path(store))
+    if snapshot is not None and snapshot.version == version and snapshot.csv_digest == store.csv_digest():
+        return snapshot
+    return compile_snapshot(store)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile or inspect the binary catalog snapshot")
+    parser.add_argument('command', choices=['compile', 'info'])
+    parser.add_argument('--csv', default='Courses.csv')
+    args = parser.parse_args()
+
+    store = get_course_store(args.csv)
+    snapshot = compile_snapshot(store) if args.command == 'compile' else load_snapshot(snapshot_path(store))
+    if snapshot is None:
+        print(f"No usable snapshot at {snapshot_path(store)}")
+        return
+    print(f"{snapshot.path}: catalog version {snapshot.version}, {snapshot.course_count} courses, "
+          f"{os.path.getsize(snapshot.path)} bytes, current: {snapshot.version == store.version()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""SQLite-backed course catalog.
+
+The store is seeded from Courses.csv and from then on receives single-course
+upserts and deletes from admin_app.py. Every write bumps a monotonic catalog
+version in the same transaction, which KnowledgeBase and the caches key on.
+If Courses.csv itself is edited, the next read re-imports it.
+
+    python course_store.py import   # reload the store from Courses.csv
+    python course_store.py export   # write the store back to Courses.csv
+"""
+import argparse
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from storage import Database
+
+# Catalog column names as they appear in Courses.csv
+COLUMNS = ['Code', 'Course Name', 'Description', 'prerequisite', 'Co-requisites', 'CH', 'Semester Offered']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    prerequisite TEXT NOT NULL DEFAULT '',
+    corequisites TEXT NOT NULL DEFAULT '',
+    ch NUMERIC,
+    semester_offered TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', '0');
+"""
+
+_SELECT_COURSES = """
+SELECT code, name, description, prerequisite, corequisites, ch, semester_offered
+FROM courses ORDER BY position
+"""
+
+def _file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def _row_values(course: Dict) -> Tuple:
+    """Course dict keyed by catalog column names -> values in COLUMNS order"""
+    values = []
+    for column in COLUMNS:
+        value = course.get(column, '')
+        if hasattr(value, 'item'):  # NumPy scalar from pandas
+            value = value.item()
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            value = ''
+        values.append(value)
+    return tuple(values)
+
+class CourseStore:
+    def __init__(self, db_path: str, csv_path: Optional[str] = None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.db = Database(db_path)
+        self.db.connection.executescript(_SCHEMA)
+        self._csv_signature = None
+        self._sync_lock = threading.Lock()
+
+    def version(self) -> int:
+        """Current catalog version; changes on every committed write"""
+        row = self.db.connection.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()
+        return int(row[0])
+
+    def _meta(self, connection, key: str) -> Optional[str]:
+        row = connection.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def csv_digest(self) -> str:
+        """Digest of the CSV file last imported or exported ('' if none)"""
+        return self._meta(self.db.connection, 'csv_digest') or ''
+
+    def _bump_version(self, connection) -> int:
+        connection.execute("UPDATE catalog_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+        return int(self._meta(connection, 'version'))
+
+    def snapshot(self) -> Tuple[int, pd.DataFrame]:
+        """Read the version and all courses (in catalog order) from one consistent view"""
+        connection = self.db.connection
+        connection.execute('BEGIN')
+        try:
+            version = int(self._meta(connection, 'version'))
+            rows = connection.execute(_SELECT_COURSES).fetchall()
+        finally:
+            connection.execute('COMMIT')
+        return version, pd.DataFrame.from_records(rows, columns=COLUMNS)
+
+    def get_course(self, code: str) -> Optional[Dict]:
+        row = self.db.connection.execute(
+            _SELECT_COURSES.replace('ORDER BY position', 'WHERE code = ?'), (code,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def add_course(self, course: Dict) -> Optional[int]:
+        """Insert a new course; returns the new catalog version, or None if the code already exists"""
+        code, name, description, prerequisite, corequisites, ch, semester = _row_values(course)
+        with self.db.transaction() as connection:
+            cursor = connection.execute("""
+                INSERT INTO courses (code, name, description, prerequisite, corequisites, ch, semester_offered, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM courses))
+                ON CONFLICT(code) DO NOTHING
+            """, (code, name, description, prerequisite, corequisites, ch, semester))
+            if cursor.rowcount == 0:
+                return None
+            return self._bump_version(connection)
+
+    def upsert_course(self, course: Dict) -> int:
+        """Insert or update one course atomically; returns the new catalog version"""
+        code, name, description, prerequisite, corequisites, ch, semester = _row_values(course)
+        with self.db.transaction() as connection:
+            connection.execute("""
+                INSERT INTO courses (code, name, description, prerequisite, corequisites, ch, semester_offered, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM courses))
+                ON CONFLICT(code) DO UPDATE SET
+                    name = excluded.name,
+                    description = excluded.description,
+                    prerequisite = excluded.prerequisite,
+                    corequisites = excluded.corequisites,
+                    ch = excluded.ch,
+                    semester_offered = excluded.semester_offered
+            """, (code, name, description, prerequisite, corequisites, ch, semester))
+            return self._bump_version(connection)
+
+    def delete_course(self, code: str) -> int:
+        """Delete one course atomically; returns the new catalog version"""
+        with self.db.transaction() as connection:
+            connection.execute("DELETE FROM courses WHERE code = ?", (code,))
+            return self._bump_version(connection)
+
+    def import_csv(self, csv_path: str) -> int:
+        """Replace the whole catalog with the contents of a CSV file"""
+        digest = _file_digest(csv_path)
+        courses_df = pd.read_csv(csv_path)
+        rows = []
+        seen = set()
+        for course in courses_df.to_dict('records'):
+            values = _row_values(course)
+            if values[0] in seen:  # First row wins for duplicated codes
+                continue
+            seen.add(values[0])
+            rows.append(values + (len(rows),))
+        with self.db.transaction() as connection:
+            connection.execute("DELETE FROM courses")
+            connection.executemany("""
+                INSERT INTO courses (code, name, description, prerequisite, corequisites, ch, semester_offered, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            connection.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('csv_digest', ?)", (digest,))
+            return self._bump_version(connection)
+
+    def export_csv(self, csv_path: str):
+        """Write the catalog back to CSV (atomically replacing the file)"""
+        _, courses_df = self.snapshot()
+        temp_path = csv_path + '.tmp'
+        courses_df.to_csv(temp_path, index=False)
+        os.replace(temp_path, csv_path)
+        with self.db.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('csv_digest', ?)",
+                               (_file_digest(csv_path),))
+
+    def sync_from_csv(self):
+        """Import the seed CSV if the store is new or the file changed since the last import/export"""
+        if not self.csv_path or not os.path.exists(self.csv_path):
+            return
+        stat = os.stat(self.csv_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._csv_signature:
+            return
+        with self._sync_lock:
+            if signature == self._csv_signature:
+                return
+            if _file_digest(self.csv_path) != self._meta(self.db.connection, 'csv_digest'):
+                self.import_csv(self.csv_path)
+            self._csv_signature = signature
+
+# One store per catalog file, kept next to it as <name>.db
+_stores_lock = threading.Lock()
+_stores: Dict[str, CourseStore] = {}
+
+def get_course_store(courses_file: str = 'Courses.csv') -> CourseStore:
+    """Get the process-wide CourseStore that backs a catalog CSV"""
+    csv_path = os.path.abspath(courses_file)
+    with _stores_lock:
+        store = _stores.get(csv_path)
+        if store is None:
+            store = _stores[csv_path] = CourseStore(os.path.splitext(csv_path)[0] + '.db', csv_path)
+    store.sync_from_csv()
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite course store")
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('--csv', default='Courses.csv')
+    args = parser.parse_args()
+
+    store = get_course_store(args.csv)
+    if args.command == 'import':
+        print(f"Imported {args.csv}, catalog version {store.import_csv(args.csv)}")
+    else:
+        store.export_csv(args.csv)
+        print(f"Exported catalog version {store.version()} to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import time
+from bisect import insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from knowledge_base import KnowledgeBase, get_knowledge_base
+from prerequisite_graph import iter_bits
+
+class PlannedTerm(NamedTuple):
+    semester: str
+    courses: Tuple[str, ...]
+    credit_hours: int
+
+class DegreePlan(NamedTuple):
+    terms: List[PlannedTerm]
+    unschedulable: List[str]  # Courses whose requirements can never be met
+    unplanned: List[str]  # Schedulable courses left over when max_terms ran out
+
+    @property
+    def term_count(self) -> int:
+        return len(self.terms)
+
+SEMESTERS = ('FALL', 'SPRING')
+
+class _Planner:
+    """Schedules the remaining catalog courses into as few terms as possible.
+
+    Courses are handled as integer ids and course sets as bitsets (see
+    PrerequisiteGraph). The search starts from a critical-path list
+    schedule and then runs a memoized depth-first search over a few
+    alternative term choices, pruned with a lower bound built from the
+    longest remaining prerequisite chain and the remaining credit hours.
+    """
+
+    def __init__(self, kb: KnowledgeBase, credit_limit: int, first_semester: int,
+                 passed_mask: int, todo_mask: int, failed_mask: int, node_budget: int):
+        self.kb = kb
+        self.graph = kb.prerequisite_graph
+        self.credit_limit = credit_limit
+        self.first_semester = first_semester
+        self.passed_mask = passed_mask
+        self.failed_mask = failed_mask
+        self.nodes_left = node_budget
+        self.deadline = float('inf')
+
+        graph = self.graph
+        self.records = [kb.get_course_record(code) for code in graph.codes[:graph.course_count]]
+        self.credits = [r.credit_hours for r in self.records]
+        self.dependent_counts = [bin(graph.dependent_masks[i]).count('1') for i in range(graph.course_count)]
+        self.offered_masks = (
+            sum(1 << i for i, r in enumerate(self.records) if r.offered_fall),
+            sum(1 << i for i, r in enumerate(self.records) if r.offered_spring),
+        )
+        self.set_todo(todo_mask)
+
+    def reachable(self) -> int:
+        """Todo courses that some sequence of terms can complete, ignoring credit limits
+
+        A course is out of reach if it is never offered, needs a code outside
+        the catalog that was not passed, sits on a prerequisite cycle, or
+        depends (through prerequisites or co-requisites) on such a course.
+        """
+        graph = self.graph
+        done = self.passed_mask
+        while True:
+            added = 0
+            for offered in self.offered_masks:
+                candidates = graph.prerequisites_met(done) & offered & self.todo_mask & ~done
+                # Co-requisites have to be passed or taken in the same term
+                while True:
+                    allowed = done | candidates
+                    keep = candidates
+                    for i in iter_bits(candidates):
+                        if graph.corequisite_masks[i] & ~allowed:
+                            keep &= ~(1 << i)
+                    if keep == candidates:
+                        break
+                    candidates = keep
+                added |= candidates
+            if not added:
+                return done & self.todo_mask
+            done |= added
+
+    def set_todo(self, todo_mask: int):
+        """Restrict planning to todo_mask and recompute the critical paths"""
+        self.todo_mask = todo_mask
+        self.tail = self._critical_path_lengths()
+        self._failed_slack: Dict[Tuple[int, int], int] = {}
+
+    def _critical_path_lengths(self) -> List[int]:
+        """Minimum number of terms from taking a course to finishing everything it unblocks"""
+        graph = self.graph
+        records = self.records
+        todo = self.todo_mask
+        tail = [1] * graph.course_count
+
+        def single_semester(i):
+            return records[i].offered_fall != records[i].offered_spring
+
+        # Walk from the last courses of each chain back to their prerequisites
+        waiting = {i: len(graph.ids_of(graph.dependent_masks[i] & todo)) for i in iter_bits(todo)}
+        ready = [i for i, count in waiting.items() if count == 0]
+        while ready:
+            i = ready.pop()
+            for d in iter_bits(graph.dependent_masks[i] & todo):
+                # A dependent offered only in the same single semester is a full year later
+                same_term = (single_semester(i) and single_semester(d) and
+                             records[i].offered_fall == records[d].offered_fall)
+                tail[i] = max(tail[i], (2 if same_term else 1) + tail[d])
+            for p in iter_bits(graph.prerequisite_masks[i] & todo):
+                waiting[p] -= 1
+                if waiting[p] == 0:
+                    ready.append(p)
+        return tail
+
+    def lower_bound(self, done: int, term: int) -> int:
+        remaining = self.todo_mask & ~done
+        if not remaining:
+            return 0
+        offered_now = self.offered_masks[(self.first_semester + term) % 2]
+        bound = 0
+        for i in iter_bits(remaining):
+            bound = max(bound, self.tail[i] + (0 if offered_now >> i & 1 else 1))
+        credits = sum(self.credits[i] for i in iter_bits(remaining))
+        return max(bound, -(-credits // self.credit_limit))
+
+    def available(self, done: int, term: int) -> List[int]:
+        """Courses that may be taken this term, ignoring co-requisites"""
+        graph = self.graph
+        offered = self.offered_masks[(self.first_semester + term) % 2]
+        open_mask = graph.prerequisites_met(done) & offered & self.todo_mask & ~done
+        return list(iter_bits(open_mask))
+
+    def fill_term(self, done: int, candidates: Iterable[int], candidate_mask: Optional[int] = None,
+                  smallest: Optional[int] = None) -> int:
+        """Greedily pack a term in candidate order, adding unmet co-requisites alongside
+
+        Callers that already track the candidate bitset, or a lower bound on
+        the candidates' credit hours, can pass them to skip recomputing them.
+        """
+        graph = self.graph
+        chosen = 0
+        credits = 0
+        if candidate_mask is None:
+            candidate_mask = sum(1 << i for i in candidates)
+        if smallest is None:
+            smallest = min(self.credits[i] for i in candidates)
+        for i in candidates:
+            if self.credit_limit - credits < smallest:
+                break  # Nothing else can fit
+            if chosen >> i & 1:
+                continue
+            bundle = 1 << i
+            # Pull in co-requisites (and theirs) that are not passed yet
+            missing = graph.corequisite_masks[i] & ~(done | chosen)
+            if not missing:
+                if credits + self.credits[i] <= self.credit_limit:
+                    chosen |= bundle
+                    credits += self.credits[i]
+                continue
+            while missing:
+                if missing & ~candidate_mask:
+                    bundle = 0
+                    break
+                bundle |= missing
+                next_missing = 0
+                for j in iter_bits(missing):
+                    next_missing |= graph.corequisite_masks[j]
+                missing = next_missing & ~(done | chosen | bundle)
+            if not bundle:
+                continue
+            bundle_credits = sum(self.credits[j] for j in iter_bits(bundle & ~chosen))
+            if credits + bundle_credits <= self.credit_limit:
+                chosen |= bundle
+                credits += bundle_credits
+        return chosen
+
+    def first_order(self, candidates: List[int]) -> List[int]:
+        """Retakes first, then the longest chain, then courses that unblock the most"""
+        failed = self.failed_mask
+        return sorted(candidates, key=lambda i: (-(failed >> i & 1), -self.tail[i], -self.dependent_counts[i], i))
+
+    def term_options(self, done: int, term: int) -> List[int]:
+        """A few distinct ways to fill this term, most promising first"""
+        candidates = self.available(done, term)
+        if not candidates:
+            return [0]
+        orders = [
+            self.first_order(candidates),
+            sorted(candidates, key=lambda i: (-self.tail[i], -self.credits[i], i)),
+            sorted(candidates, key=lambda i: (-self.credits[i], -self.tail[i], i)),
+            sorted(candidates, key=lambda i: (-self.tail[i], self.credits[i], i)),
+        ]
+        options = []
+        for order in orders:
+            chosen = self.fill_term(done, order)
+            if chosen not in options:
+                options.append(chosen)
+        return options
+
+    def search(self, done: int, term: int, limit: int) -> Optional[List[int]]:
+        """Best list of term bitsets finishing from `done` in fewer than `limit` terms"""
+        if not self.todo_mask & ~done:
+            return []
+        slack = limit - term
+        if self.nodes_left <= 0 or time.perf_counter() > self.deadline:
+            return None
+        if self.lower_bound(done, term) >= slack:
+            return None
+        # Same courses done at the same point of the year already failed with as much room
+        key = (done, (self.first_semester + term) % 2)
+        if self._failed_slack.get(key, 0) >= slack:
+            return None
+        self.nodes_left -= 1
+
+        best = None
+        for chosen in self.term_options(done, term):
+            rest = self.search(done | chosen, term + 1, limit)
+            if rest is not None:
+                best = [chosen] + rest
+                limit = term + len(best)
+                if len(best) == self.lower_bound(done, term):
+                    break
+        if best is None:
+            self._failed_slack[key] = slack
+        return best
+
+    def greedy(self, max_terms: Optional[int]) -> Tuple[List[int], int]:
+        """Critical-path list schedule; returns the terms and the courses it could not place"""
+        graph = self.graph
+        todo = self.todo_mask
+        failed = self.failed_mask
+        done = self.passed_mask
+        terms = []
+        if not todo & ~done:
+            return terms, 0
+
+        # Open courses (prerequisites done) per semester, kept in first_order order,
+        # so each term only touches the courses that just opened up
+        def key(i):
+            return (-(failed >> i & 1), -self.tail[i], -self.dependent_counts[i], i)
+
+        open_keys: Tuple[List, List] = ([], [])
+        open_masks = [0, 0]
+
+        def open_course(i):
+            for semester in (0, 1):
+                if self.offered_masks[semester] >> i & 1:
+                    insort(open_keys[semester], key(i))
+                    open_masks[semester] |= 1 << i
+
+        missing = {}
+        for i in iter_bits(todo & ~done):
+            missing[i] = bin(graph.prerequisite_masks[i] & todo & ~done).count('1')
+            if not missing[i]:
+                open_course(i)
+        smallest = min(self.credits[i] for i in iter_bits(todo & ~done))
+
+        idle = 0
+        while todo & ~done and (max_terms is None or len(terms) < max_terms) and idle < 2:
+            semester = (self.first_semester + len(terms)) % 2
+            chosen = 0
+            if open_masks[semester]:
+                chosen = self.fill_term(done, [k[-1] for k in open_keys[semester]], open_masks[semester], smallest)
+            idle = 0 if chosen else idle + 1
+            terms.append(chosen)
+            done |= chosen
+            if chosen:
+                for s in (0, 1):
+                    if open_masks[s] & chosen:
+                        open_keys[s][:] = [k for k in open_keys[s] if not chosen >> k[-1] & 1]
+                        open_masks[s] &= ~chosen
+                for i in iter_bits(chosen):
+                    for d in iter_bits(graph.dependent_masks[i] & todo & ~done):
+                        missing[d] -= 1
+                        if not missing[d]:
+                            open_course(d)
+        while terms and not terms[-1]:
+            terms.pop()
+        return terms, self.todo_mask & ~done
+
+def plan_degree_path(start_semester: str, cgpa: float,
+                     passed_courses: Iterable[str],
+                     failed_courses: Iterable[str] = (),
+                     kb: KnowledgeBase = None,
+                     max_terms: Optional[int] = None,
+                     node_budget: int = 5000,
+                     time_limit: float = 0.5) -> DegreePlan:
+    """
+    Plan every remaining catalog course across future terms
+
+    Terms alternate FALL/SPRING starting at start_semester and are capped at
+    the CGPA credit limit. A course is placed in a term only if it is offered
+    that semester, its prerequisites were passed in earlier terms and its
+    co-requisites are passed or taken in the same term. Failed courses have
+    to be retaken and are preferred when a term is filled. The plan
+    minimizes the number of terms; the search stops after node_budget
+    states or time_limit seconds and keeps the best plan found.
+
+    Courses whose requirements can never be met are returned in
+    `unschedulable`. With a max_terms cap, schedulable courses that did not
+    fit are returned in `unplanned` instead.
+    """
+    kb = kb if kb is not None else get_knowledge_base()
+    graph = kb.prerequisite_graph
+    passed_mask = graph.mask_of(passed_courses)
+    failed_mask = graph.mask_of(failed_courses) & graph.catalog_mask
+    todo_mask = graph.catalog_mask & ~(passed_mask & ~failed_mask)
+    first_semester = SEMESTERS.index(start_semester) if start_semester in SEMESTERS else 0
+    credit_limit = kb.get_credit_limit(cgpa)
+    # Failed courses are no longer counted as passed
+    passed_mask &= ~failed_mask
+
+    planner = _Planner(kb, credit_limit, first_semester, passed_mask, todo_mask, failed_mask, node_budget)
+    planner.deadline = time.perf_counter() + time_limit
+    reachable = planner.reachable()
+    unschedulable = todo_mask & ~reachable
+    planner.set_todo(reachable)
+    terms, unplanned = planner.greedy(max_terms)
+    # Plan what the list schedule placed optimally; a capped plan keeps its leftovers out
+    if unplanned:
+        planner.set_todo(planner.todo_mask & ~unplanned)
+    if terms and planner.deadline > time.perf_counter():
+        improved = planner.search(passed_mask, 0, len(terms))
+        if improved is not None:
+            terms = improved
+
+    planned_terms = [
+        PlannedTerm(
+            semester=SEMESTERS[(first_semester + t) % 2],
+            courses=tuple(graph.codes_of(chosen)),
+            credit_hours=sum(kb.get_credit_hours(code) for code in graph.codes_of(chosen)),
+        )
+        for t, chosen in enumerate(terms)
+    ]
+    return DegreePlan(terms=planned_terms, unschedulable=graph.codes_of(unschedulable),
+                      unplanned=graph.codes_of(unplanned))
@@ -1,9 +1,49 @@
-from typing import List, Dict, Set
-from knowledge_base import KnowledgeBase
+import threading
+from collections.abc import Mapping
+from typing import Callable, Iterable, List, Dict, Set, Tuple
+from knowledge_base import KnowledgeBase, add_catalog_listener, get_knowledge_base
+
+class LazyCourseExplanations(Mapping):
+    """Read-only mapping of course code -> explanation dict, rendered on first access"""
+    def __init__(self, courses: Iterable[str], render: Callable[[str], Dict[str, str]]):
+        self._courses = tuple(courses)
+        self._course_set = frozenset(self._courses)
+        self._render = render
+        self._rendered: Dict[str, Dict[str, str]] = {}
+
+    def __getitem__(self, course: str) -> Dict[str, str]:
+        if course not in self._course_set:
+            raise KeyError(course)
+        explanation = self._rendered.get(course)
+        if explanation is None:
+            explanation = self._rendered[course] = self._render(course)
+        return explanation
+
+    def __iter__(self):
+        return iter(self._courses)
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    def to_dict(self) -> Dict[str, Dict[str, str]]:
+        """Every explanation rendered, as plain dicts (e.g. for json.dumps)"""
+        return {course: dict(self[course]) for course in self._courses}
+
+# Rendered course explanations shared by every ExplanationSystem, for one catalog version
+_RENDER_CACHE_SIZE = 10000
+_render_cache_lock = threading.Lock()
+_render_cache: Dict[Tuple, Dict[str, str]] = {}
+_render_cache_version = None
+
+def _on_catalog_reload(kb: KnowledgeBase):
+    with _render_cache_lock:
+        _render_cache.clear()
+
+add_catalog_listener(_on_catalog_reload)
 
 class ExplanationSystem:
-    def __init__(self):
-        self.kb = KnowledgeBase()
+    def __init__(self, kb: KnowledgeBase = None):
+        self.kb = kb if kb is not None else get_knowledge_base()
         
     def get_credit_limit_explanation(self, cgpa: float, credit_limit: int) -> str:
         """Generate explanation for credit hour limit based on CGPA"""
@@ -63,33 +103,67 @@ class ExplanationSystem:
                                               passed_courses: set,
                                               failed_courses: set,
                                               current_courses: set) -> dict:
-        """Generate detailed explanations for course recommendations"""
+        """Generate detailed explanations for course recommendations
+
+        'courses' is a LazyCourseExplanations, not a dict: call its to_dict()
+        before serializing the explanations.
+        """
         explanations = {
             'credit_limit': self.get_credit_limit_explanation(cgpa, self.kb.get_credit_limit(cgpa)),
             'failed_courses_summary': self._get_failed_courses_summary(failed_courses),
-            'courses': {}
         }
         
         # Sort courses to show failed courses first
         sorted_courses = sorted(recommended_courses, 
                               key=lambda x: (x not in failed_courses, x))
-        
-        for course in sorted_courses:
-            course_explanations = {
-                'failed_priority': self.get_failed_priority_explanation(course) if course in failed_courses else "",
-                'prerequisites': self.get_prerequisites_explanation(
-                    course, self.kb.get_prerequisites(course), passed_courses
-                ),
-                'corequisites': self.get_corequisites_explanation(
-                    course, self.kb.get_corequisites(course), passed_courses, current_courses
-                ),
-                'semester': self.get_semester_explanation(
-                    course, semester, self.kb.get_semester_offered(course)
-                )
-            }
-            explanations['courses'][course] = course_explanations
+
+        # Course texts are only built when the UI actually reads them
+        passed_courses = frozenset(passed_courses)
+        failed_courses = frozenset(failed_courses)
+        current_courses = frozenset(current_courses)
+        explanations['courses'] = LazyCourseExplanations(
+            sorted_courses,
+            lambda course: self.get_course_explanation(course, semester, passed_courses,
+                                                       failed_courses, current_courses))
             
         return explanations
+
+    def get_course_explanation(self, course: str, semester: str, passed_courses: Set[str],
+                               failed_courses: Set[str], current_courses: Set[str]) -> Dict[str, str]:
+        """Explanation texts for one recommended course, cached per catalog version"""
+        global _render_cache_version
+        prerequisites = self.kb.get_prerequisites(course)
+        corequisites = self.kb.get_corequisites(course)
+        # The texts only depend on which of this course's requirements are met
+        key = (course, semester, course in failed_courses,
+               tuple(p in passed_courses for p in prerequisites),
+               tuple(c in passed_courses or c in current_courses for c in corequisites))
+        with _render_cache_lock:
+            if _render_cache_version != self.kb.version:
+                _render_cache.clear()
+                _render_cache_version = self.kb.version
+            cached = _render_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        course_explanations = {
+            'failed_priority': self.get_failed_priority_explanation(course) if course in failed_courses else "",
+            'prerequisites': self.get_prerequisites_explanation(
+                course, prerequisites, passed_courses
+            ),
+            'corequisites': self.get_corequisites_explanation(
+                course, corequisites, passed_courses, current_courses
+            ),
+            'semester': self.get_semester_explanation(
+                course, semester, self.kb.get_semester_offered(course)
+            )
+        }
+        with _render_cache_lock:
+            if _render_cache_version == self.kb.version:
+                if len(_render_cache) >= _RENDER_CACHE_SIZE:
+                    _render_cache.clear()
+                _render_cache[key] = course_explanations
+        return dict(course_explanations)
         
     def _get_failed_courses_summary(self, failed_courses: set) -> str:
         """Generate a summary of failed courses"""
@@ -1,7 +1,15 @@
 from experta import *
-from knowledge_base import KnowledgeBase
+from knowledge_base import KnowledgeBase, add_catalog_listener, get_knowledge_base, split_codes
 from explanation_system import ExplanationSystem
-from typing import List, Set, Dict, Tuple
+from recommendation_cache import RecommendationCache
+from recommendation_result import RecommendationResult, RecommendedCourse
+from schedule_optimizer import optimize_selection
+import instrumentation
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set, Dict, Tuple
+import os
+import threading
+import numpy as np
 import pandas as pd
 
 class Student(Fact):
@@ -17,15 +25,35 @@ class Recommendation(Fact):
     pass
 
 class CourseAdvisor(KnowledgeEngine):
-    def __init__(self):
+    def __init__(self, kb: KnowledgeBase = None):
         super().__init__()
-        self.kb = KnowledgeBase()
-        self.explanation_system = ExplanationSystem()
+        self.kb = kb if kb is not None else get_knowledge_base()
+        self.explanation_system = ExplanationSystem(self.kb)
+        self._clear_request_state()
+
+    def _clear_request_state(self):
         self.failed_recommendations = []  # Separate list for failed courses
         self.regular_recommendations = []  # Separate list for regular courses
         self.current_courses = set()
         self.failed_courses_recommended = set()
-        
+
+    def reset(self, **kwargs):
+        """Clear working memory and per-request state so the engine can be reused"""
+        self._clear_request_state()
+        super().reset(**kwargs)
+
+    def advise(self, semester: str, cgpa: float, passed_courses: List[str], failed_courses: List[str]):
+        """Run the rule network for one student, filling the recommendation lists"""
+        with instrumentation.phase('engine_reset'):
+            self.reset()
+        self.declare(Student(semester=semester,
+                             cgpa=cgpa,
+                             passed_courses=passed_courses,
+                             failed_courses=failed_courses))
+        with instrumentation.phase('engine_run'):
+            self.run()
+        instrumentation.count('facts_declared', len(self.facts))
+
     @DefFacts()
     def _initial_facts(self):
         yield Fact(engine_started=True)
@@ -37,6 +65,7 @@ class CourseAdvisor(KnowledgeEngine):
                  failed_courses=MATCH.failed))
     def initialize_recommendations(self, semester, cgpa, passed, failed):
         """Initialize the recommendation process"""
+        instrumentation.count('rules_fired')
         self.credit_limit = self.kb.get_credit_limit(cgpa)
         self.current_credits = 0
         self.current_courses = set()
@@ -63,6 +92,7 @@ class CourseAdvisor(KnowledgeEngine):
     @Rule(Course(code=MATCH.code, type='failed', priority=1))
     def process_failed_courses(self, code):
         """Rule to process failed courses first"""
+        instrumentation.count('rules_fired')
         if code not in self.failed_courses_recommended:
             # Add to failed recommendations list without checking credits yet
             self.failed_recommendations.append(code)
@@ -71,63 +101,354 @@ class CourseAdvisor(KnowledgeEngine):
     @Rule(Course(code=MATCH.code, type='available', priority=2))
     def process_available_courses(self, code):
         """Rule to process regular courses"""
+        instrumentation.count('rules_fired')
         if code not in self.current_courses and code not in self.student_info['failed_courses']:
             # Add to regular recommendations list without checking credits yet
             self.regular_recommendations.append(code)
 
+class AdvisorPool:
+    """Keeps idle CourseAdvisor engines so requests skip building the Rete network"""
+    def __init__(self, max_idle: int = 8):
+        self.max_idle = max_idle
+        self._idle: List[CourseAdvisor] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def advisor(self, kb: KnowledgeBase) -> Iterator[CourseAdvisor]:
+        """Borrow an engine bound to `kb` for the duration of one request"""
+        with self._lock:
+            # Engines compiled against an older catalog are dropped
+            self._idle = [engine for engine in self._idle if engine.kb is kb]
+            engine = self._idle.pop() if self._idle else None
+        if engine is None:
+            engine = CourseAdvisor(kb)
+        try:
+            yield engine
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(engine)
+
+    def clear(self):
+        with self._lock:
+            self._idle = []
+
+_advisor_pool = AdvisorPool()
+
+def prewarm(kb: KnowledgeBase = None):
+    """Load the catalog and build one pooled engine ahead of the first request"""
+    kb = kb if kb is not None else get_knowledge_base()
+    with _advisor_pool.advisor(kb):
+        pass
+
+# Evaluate the standard rule set as plain Python instead of through experta
+USE_COMPILED_RULES = os.environ.get('ADVISOR_COMPILED_RULES', '') == '1'
+
+def evaluate_rules_compiled(kb: KnowledgeBase, semester: str,
+                            passed_courses: List[str],
+                            failed_courses: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Evaluate the CourseAdvisor rules as straight-line code
+
+    Produces the same (failed_recommendations, regular_recommendations)
+    lists as CourseAdvisor.advise. experta collapses duplicate facts and
+    fires the most recently declared course fact first, so both lists come
+    out in reverse declaration order.
+    """
+    passed = set(passed_courses)
+    failed = set(failed_courses)
+
+    # process_failed_courses: every failed course, once
+    failed_recommendations = list(dict.fromkeys(failed_courses))[::-1]
+
+    # process_available_courses: semester courses neither passed nor failed
+    regular_recommendations = [code for code in dict.fromkeys(kb.get_semester_courses(semester))
+                               if code not in passed and code not in failed][::-1]
+    return failed_recommendations, regular_recommendations
+
+# Results shared by students with the same semester, credit limit and course history
+_recommendation_cache = RecommendationCache(maxsize=2048, ttl=600.0)
+
+# Catalog accessors used while advising, counted as catalog_lookups when instrumentation is on
+instrumentation.count_calls(KnowledgeBase, [
+    'get_course_record', 'get_course_by_code', 'get_prerequisites', 'get_corequisites',
+    'get_credit_hours', 'get_semester_offered', 'get_available_courses', 'get_credit_limit',
+], 'catalog_lookups')
+
+def _on_catalog_reload(kb: KnowledgeBase):
+    """Drop recommendations and engines built from the previous catalog"""
+    _recommendation_cache.clear()
+    _advisor_pool.clear()
+
+add_catalog_listener(_on_catalog_reload)
+
+@instrumentation.instrumented
 def get_course_recommendations(semester: str, cgpa: float, 
                              passed_courses: List[str], 
-                             failed_courses: List[str]) -> Tuple[List[str], Dict, int]:
+                             failed_courses: List[str],
+                             compiled: Optional[bool] = None,
+                             use_cache: bool = True,
+                             optimize: bool = False,
+                             kb: KnowledgeBase = None) -> Tuple[List[str], Dict, int]:
     """
     Get course recommendations based on student information
+
+    Set `compiled` to use evaluate_rules_compiled instead of the experta
+    engine (defaults to the ADVISOR_COMPILED_RULES environment flag).
+    Set `optimize` to fill the remaining credit hours with
+    schedule_optimizer.optimize_selection instead of first-fit.
+    Results are memoized per catalog version unless use_cache is False.
+    `kb` defaults to the shared catalog from get_knowledge_base().
     
     Returns:
         Tuple containing:
         - List of recommended course codes
-        - Dictionary of explanations
+        - Dictionary of explanations; its 'courses' entry is a read-only
+          LazyCourseExplanations mapping (use .to_dict() before json.dumps)
         - Total credit hours
     """
-    engine = CourseAdvisor()
-    engine.reset()
-    engine.declare(Student(semester=semester,
-                         cgpa=cgpa,
-                         passed_courses=passed_courses,
-                         failed_courses=failed_courses))
-    engine.run()
-    
-    recommended_courses = []
-    total_credits = 0
-    credit_limit = engine.kb.get_credit_limit(cgpa)
-    
-    # First, try to add ALL failed courses that fit within credit limit
-    for code in engine.failed_recommendations:
-        course_credits = engine.kb.get_credit_hours(code)
-        if total_credits + course_credits <= credit_limit:
-            recommended_courses.append(code)
-            total_credits += course_credits
-            engine.current_courses.add(code)
+    with instrumentation.phase('catalog'):
+        kb = kb if kb is not None else get_knowledge_base()
+    credit_limit = kb.get_credit_limit(cgpa)
+    if compiled is None:
+        compiled = USE_COMPILED_RULES
+    # CGPA only matters through its credit limit band; failed order decides which retakes fit.
+    # The evaluator is part of the key so a cached result never hides which one produced it.
+    cache_key = (semester, credit_limit, frozenset(passed_courses), tuple(dict.fromkeys(failed_courses)),
+                 optimize, compiled)
+    if use_cache:
+        with instrumentation.phase('cache'):
+            cached = _recommendation_cache.get(cache_key, kb.version)
+        instrumentation.count('cache_hits' if cached is not None else 'cache_misses')
+        if cached is not None:
+            recommended_courses, explanations, total_credits = cached
+            # The credit limit text quotes the exact CGPA, so it is rebuilt per call
+            explanations = dict(explanations, credit_limit=ExplanationSystem(kb).get_credit_limit_explanation(
+                cgpa, credit_limit))
+            return list(recommended_courses), explanations, total_credits
+
+    result = _compute_recommendations(kb, semester, cgpa, passed_courses, failed_courses, compiled, optimize)
+    if use_cache:
+        _recommendation_cache.put(cache_key, kb.version, result)
+    return list(result[0]), dict(result[1]), result[2]
+
+def get_recommendation_result(semester: str, cgpa: float, passed_courses: List[str],
+                              failed_courses: List[str], optimize: bool = False,
+                              kb: KnowledgeBase = None) -> RecommendationResult:
+    """get_course_recommendations as a RecommendationResult, with catalog fields and reason flags filled in"""
+    kb = kb if kb is not None else get_knowledge_base()
+    codes, explanations, total_credits = get_course_recommendations(
+        semester, cgpa, passed_courses, failed_courses, optimize=optimize, kb=kb)
+    passed = set(passed_courses)
+    failed = set(failed_courses)
+    taken = passed.union(codes)
+    courses = []
+    for code in codes:
+        record = kb.get_course_record(code)
+        if record is None:  # A failed course missing from the catalog
+            courses.append(RecommendedCourse(code, code, '', kb.get_credit_hours(code), '', code in failed, True, True))
+            continue
+        courses.append(RecommendedCourse(
+            code=code,
+            name=record.name,
+            description=record.description,
+            credit_hours=record.credit_hours,
+            semester_offered=record.semester_offered,
+            failed_retake=code in failed,
+            prerequisites_met=passed.issuperset(record.prerequisites),
+            corequisites_satisfied=taken.issuperset(record.corequisites),
+        ))
+    return RecommendationResult(semester, cgpa, kb.get_credit_limit(cgpa), total_credits,
+                                tuple(courses), explanations)
+
+def _compute_recommendations(kb: KnowledgeBase, semester: str, cgpa: float,
+                             passed_courses: List[str], failed_courses: List[str],
+                             compiled: Optional[bool], optimize: bool = False) -> Tuple[List[str], Dict, int]:
+    if compiled is None:
+        compiled = USE_COMPILED_RULES
+    with instrumentation.phase('rules'):
+        if compiled:
+            failed_recommendations, regular_recommendations = evaluate_rules_compiled(
+                kb, semester, passed_courses, failed_courses)
+            explanation_system = ExplanationSystem(kb)
+        else:
+            with _advisor_pool.advisor(kb) as engine:
+                engine.advise(semester, cgpa, passed_courses, failed_courses)
+                failed_recommendations = engine.failed_recommendations
+                regular_recommendations = engine.regular_recommendations
+                explanation_system = engine.explanation_system
+    with instrumentation.phase('credit_fill'):
+        recommended_courses = []
+        current_courses = set()
+        total_credits = 0
+        credit_limit = kb.get_credit_limit(cgpa)
     
-    # Only if there are credits remaining, consider regular courses
-    if total_credits < credit_limit:
-        for code in engine.regular_recommendations:
-            course_credits = engine.kb.get_credit_hours(code)
-            # Check credit limit and course availability
-            if (total_credits + course_credits <= credit_limit and
-                engine.kb.is_course_available(code, semester, 
-                                           set(passed_courses), 
-                                           engine.current_courses)):
+        # First, try to add ALL failed courses that fit within credit limit
+        for code in failed_recommendations:
+            course_credits = kb.get_credit_hours(code)
+            if total_credits + course_credits <= credit_limit:
                 recommended_courses.append(code)
                 total_credits += course_credits
-                engine.current_courses.add(code)
+                current_courses.add(code)
+    
+        # Only if there are credits remaining, consider regular courses,
+        # those that unlock the most later coursework first
+        if total_credits < credit_limit:
+            regular_recommendations = kb.rank_courses(regular_recommendations)
+            # Prerequisites are checked once for the whole catalog, co-requisites per course
+            graph = kb.prerequisite_graph
+            passed_mask = graph.mask_of(passed_courses)
+            prerequisites_met = graph.prerequisites_met(passed_mask)
+            taken_mask = passed_mask | graph.mask_of(current_courses)
+            if optimize:
+                # Co-requisites are left to the optimizer, which can schedule them together
+                candidates = [code for code in regular_recommendations
+                              if kb.get_course_record(code).is_offered(semester) and
+                              graph.is_eligible(code, prerequisites_met, None)]
+                regular_recommendations = optimize_selection(
+                    kb, candidates, credit_limit - total_credits, set(passed_courses) | current_courses)
+                # The chosen set is already co-requisite complete
+                taken_mask |= graph.mask_of(regular_recommendations)
+            for code in regular_recommendations:
+                course_credits = kb.get_credit_hours(code)
+                # Check credit limit and course availability
+                if (total_credits + course_credits <= credit_limit and
+                    kb.get_course_record(code).is_offered(semester) and
+                    graph.is_eligible(code, prerequisites_met, taken_mask)):
+                    recommended_courses.append(code)
+                    total_credits += course_credits
+                    current_courses.add(code)
+                    taken_mask |= graph.mask_of((code,))
     
     # Generate detailed explanations
-    explanations = engine.explanation_system.get_detailed_recommendations_explanation(
-        recommended_courses,
-        semester,
-        cgpa,
-        set(passed_courses),
-        set(failed_courses),
-        engine.current_courses
-    )
+    with instrumentation.phase('explanations'):
+        explanations = explanation_system.get_detailed_recommendations_explanation(
+            recommended_courses,
+            semester,
+            cgpa,
+            set(passed_courses),
+            set(failed_courses),
+            current_courses
+        )
             
-    return recommended_courses, explanations, total_credits
\ No newline at end of file
+    return recommended_courses, explanations, total_credits
+
+def _as_code_list(value) -> List[str]:
+    """Accept a list of course codes or a comma-separated string of them"""
+    if isinstance(value, str):
+        return list(split_codes(value))
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return list(value)
+
+def get_course_recommendations_batch(students: pd.DataFrame, kb: KnowledgeBase = None,
+                                     chunk_size: int = 4096) -> pd.DataFrame:
+    """
+    Get course recommendations for a whole cohort at once
+
+    `students` needs the columns semester, cgpa, passed_courses and
+    failed_courses (lists or comma-separated strings). Eligibility, credit
+    limits and credit filling are evaluated with NumPy over a
+    student x course matrix, giving the same recommendations and totals as
+    get_course_recommendations for every row.
+
+    Returns:
+        DataFrame indexed like `students` with the columns
+        recommended_courses, total_credits and credit_limit
+    """
+    kb = kb if kb is not None else get_knowledge_base()
+    graph = kb.prerequisite_graph
+    course_count = graph.course_count
+    records = [kb.get_course_record(code) for code in graph.codes[:course_count]]
+    # Regular courses are considered in the catalog's impact ranking, as in get_course_recommendations
+    credit_hours, prerequisite_ids, corequisite_ids, candidate_order = kb.catalog_arrays()
+
+    results = []
+    for start in range(0, len(students), chunk_size):
+        chunk = students.iloc[start:start + chunk_size]
+        results.append(_recommend_chunk(kb, chunk, records, credit_hours,
+                                        prerequisite_ids, corequisite_ids, candidate_order))
+    if not results:
+        return pd.DataFrame(columns=['recommended_courses', 'total_credits', 'credit_limit'], index=students.index)
+    return pd.concat(results)
+
+def _recommend_chunk(kb: KnowledgeBase, chunk: pd.DataFrame, records, credit_hours: np.ndarray,
+                     prerequisite_ids, corequisite_ids, candidate_order) -> pd.DataFrame:
+    graph = kb.prerequisite_graph
+    student_count = len(chunk)
+    course_count = graph.course_count
+    rows = np.arange(student_count)
+
+    cgpa = chunk['cgpa'].to_numpy(dtype=float)
+    credit_limit = np.where(cgpa < 2.00, 12, np.where(cgpa < 3.00, 20, 22))
+
+    # passed/current cover every graph id, failed only the catalog courses
+    passed = np.zeros((student_count, len(graph.codes)), dtype=bool)
+    current = np.zeros_like(passed)
+    failed = np.zeros((student_count, course_count), dtype=bool)
+    failed_lists = []
+    for i, (passed_courses, failed_courses) in enumerate(zip(chunk['passed_courses'], chunk['failed_courses'])):
+        passed_ids = [graph.ids[c] for c in _as_code_list(passed_courses) if c in graph.ids]
+        passed[i, passed_ids] = True
+        # Duplicate failed courses collapse into one fact, fired most recent first
+        failed_courses = list(dict.fromkeys(_as_code_list(failed_courses)))[::-1]
+        failed_lists.append(failed_courses)
+        failed_ids = [graph.ids[c] for c in failed_courses if graph.ids.get(c, course_count) < course_count]
+        failed[i, failed_ids] = True
+
+    # Semester availability per student, looked up per distinct semester value
+    semesters = chunk['semester'].to_numpy(dtype=object)
+    offered = np.zeros((student_count, course_count), dtype=bool)
+    for semester in set(semesters):
+        offered[semesters == semester] = [r.is_offered(semester) for r in records]
+
+    # Failed courses first, in each student's own order, as long as they fit
+    total_credits = np.zeros(student_count, dtype=np.int64)
+    max_failed = max((len(f) for f in failed_lists), default=0)
+    failed_credits = np.zeros((student_count, max_failed), dtype=np.int64)
+    failed_valid = np.zeros((student_count, max_failed), dtype=bool)
+    failed_graph_ids = np.full((student_count, max_failed), -1, dtype=np.intp)
+    for i, failed_courses in enumerate(failed_lists):
+        for k, code in enumerate(failed_courses):
+            failed_credits[i, k] = kb.get_credit_hours(code)
+            failed_valid[i, k] = True
+            failed_graph_ids[i, k] = graph.ids.get(code, -1)
+    failed_taken = np.zeros((student_count, max_failed), dtype=bool)
+    for k in range(max_failed):
+        fits = failed_valid[:, k] & (total_credits + failed_credits[:, k] <= credit_limit)
+        total_credits += np.where(fits, failed_credits[:, k], 0)
+        failed_taken[:, k] = fits
+        known = fits & (failed_graph_ids[:, k] >= 0)
+        current[rows[known], failed_graph_ids[known, k]] = True
+
+    # Then regular courses while credits remain
+    active = total_credits < credit_limit
+    # regular_taken is indexed by position in candidate_order
+    regular_taken = np.zeros((student_count, len(candidate_order)), dtype=bool)
+    for position, course_id in enumerate(candidate_order):
+        candidates = active & offered[:, course_id] & ~passed[:, course_id] & ~failed[:, course_id]
+        candidates &= total_credits + credit_hours[course_id] <= credit_limit
+        if not candidates.any():
+            continue
+        prereqs = prerequisite_ids[course_id]
+        if prereqs.size:
+            candidates &= passed[:, prereqs].all(axis=1)
+        coreqs = corequisite_ids[course_id]
+        if coreqs.size:
+            candidates &= (passed[:, coreqs] | current[:, coreqs]).all(axis=1)
+        total_credits += np.where(candidates, credit_hours[course_id], 0)
+        current[candidates, course_id] = True
+        regular_taken[candidates, position] = True
+
+    candidate_codes = np.array(graph.codes[:course_count], dtype=object)[candidate_order]
+    recommended = []
+    for i, failed_courses in enumerate(failed_lists):
+        courses = [code for k, code in enumerate(failed_courses) if failed_taken[i, k]]
+        courses.extend(candidate_codes[np.flatnonzero(regular_taken[i])])
+        recommended.append(courses)
+
+    return pd.DataFrame({
+        'recommended_courses': recommended,
+        'total_credits': total_credits,
+        'credit_limit': credit_limit,
+    }, index=chunk.index)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""Opt-in timing and counters for the recommendation hot path.
+
+Set ADVISOR_INSTRUMENTATION=1 to turn it on. Every get_course_recommendations
+call then records the wall time of its phases (catalog, cache, rules,
+credit_fill, explanations) and counters such as facts_declared,
+rules_fired, catalog_lookups, cache_hits and cache_misses. Each process
+aggregates the records into latency histograms and counter totals, logs
+them as one line on the 'advisor.metrics' logger every
+ADVISOR_INSTRUMENTATION_LOG_EVERY requests (default 100), and
+advisor_service.py serves them at GET /metrics.
+
+With the flag off, instrumented() and count_calls() leave functions
+untouched and phase()/count() return straight away.
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional
+
+ENABLED = os.environ.get('ADVISOR_INSTRUMENTATION', '') == '1'
+LOG_EVERY = int(os.environ.get('ADVISOR_INSTRUMENTATION_LOG_EVERY', 100))
+
+logger = logging.getLogger('advisor.metrics')
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def as_dict(self) -> Dict:
+        labels = [f'<={bound}' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}']
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'max_ms': self.max_ms,
+            'buckets': {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+# The record of the request running in this thread/task, if any
+_current: ContextVar[Optional[Dict]] = ContextVar('advisor_request', default=None)
+
+_lock = threading.Lock()
+_requests = 0
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+# Records not yet collected by take_records(), e.g. by a service's parent process
+_unshipped: deque = deque(maxlen=10000)
+
+class _Phase:
+    __slots__ = ('phases', 'name', 'start')
+
+    def __init__(self, phases: Dict[str, float], name: str):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.phases[self.name] = self.phases.get(self.name, 0.0) + elapsed
+
+_NO_PHASE = contextlib.nullcontext()
+
+def phase(name: str):
+    """Context manager timing one phase of the current request"""
+    if not ENABLED:
+        return _NO_PHASE
+    record = _current.get()
+    if record is None:
+        return _NO_PHASE
+    return _Phase(record['phases'], name)
+
+def count(name: str, n: int = 1):
+    """Add n to a counter of the current request"""
+    if not ENABLED:
+        return
+    record = _current.get()
+    if record is not None:
+        record['counters'][name] = record['counters'].get(name, 0) + n
+
+def instrumented(func: Callable) -> Callable:
+    """Decorator making each call of func one instrumented request (no-op when disabled)"""
+    if not ENABLED:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is not None:  # Nested call: part of the outer request
+            return func(*args, **kwargs)
+        record = {'phases': {}, 'counters': {}}
+        token = _current.set(record)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record['total_ms'] = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+            add_record(record)
+    return wrapper
+
+def count_calls(cls: type, method_names: Iterable[str], counter: str):
+    """Count calls to methods of cls under `counter` (only when enabled)"""
+    if not ENABLED:
+        return
+    for name in method_names:
+        method = getattr(cls, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            count(counter)
+            return _method(*args, **kwargs)
+        setattr(cls, name, functools.wraps(method)(wrapper))
+
+def add_record(record: Dict):
+    """Fold one request record into this process's totals"""
+    global _requests
+    with _lock:
+        _requests += 1
+        _histograms.setdefault('total', Histogram()).add(record['total_ms'])
+        for name, ms in record['phases'].items():
+            _histograms.setdefault(name, Histogram()).add(ms)
+        for name, n in record['counters'].items():
+            _counters[name] = _counters.get(name, 0) + n
+        _unshipped.append(record)
+        log_now = LOG_EVERY > 0 and _requests % LOG_EVERY == 0
+    logger.debug("request %s", json.dumps(record))
+    if log_now:
+        logger.info("advisor metrics %s", json.dumps(summary()))
+
+def take_records() -> List[Dict]:
+    """Remove and return the records added since the last call"""
+    with _lock:
+        records = list(_unshipped)
+        _unshipped.clear()
+    return records
+
+def snapshot() -> Dict:
+    """Request count, per-phase histograms and counter totals"""
+    with _lock:
+        return {
+            'enabled': ENABLED,
+            'requests': _requests,
+            'phases': {name: histogram.as_dict() for name, histogram in _histograms.items()},
+            'counters': dict(_counters),
+        }
+
+def summary() -> Dict:
+    """Compact form of snapshot() for the periodic log line"""
+    with _lock:
+        return {
+            'requests': _requests,
+            'mean_ms': {name: round(h.total_ms / h.count, 3) for name, h in _histograms.items() if h.count},
+            'max_ms': {name: round(h.max_ms, 3) for name, h in _histograms.items()},
+            'counters': dict(_counters),
+        }
@@ -1,68 +1,276 @@
+import hashlib
+import io
+import os
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Set
+from course_store import get_course_store
+from prerequisite_graph import PrerequisiteGraph
+from types import MappingProxyType
+from typing import Callable, List, Dict, Set, NamedTuple, Tuple, Mapping, Optional
+
+# Load the shared catalog from its compiled binary snapshot (catalog_snapshot.py); set to 0 to parse the rows
+USE_CATALOG_SNAPSHOT = os.environ.get('ADVISOR_CATALOG_SNAPSHOT', '1') != '0'
+
+class CourseRecord(NamedTuple):
+    """Compact, immutable view of one catalog row used for fast lookups"""
+    code: str
+    name: str
+    description: str
+    prerequisites: Tuple[str, ...]
+    corequisites: Tuple[str, ...]
+    credit_hours: int
+    semester_offered: str
+    offered_fall: bool
+    offered_spring: bool
+
+    def is_offered(self, semester: str) -> bool:
+        """Check if the course runs in the given semester"""
+        return self.semester_offered in (semester, 'BOTH')
+
+def split_codes(value) -> Tuple[str, ...]:
+    """Parse a comma-separated course list (catalog requirements, student course lists)"""
+    if isinstance(value, str):
+        return tuple(c.strip() for c in value.split(',') if c.strip())
+    return ()
+
+def _parse_credit_hours(value) -> int:
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return 3  # Default to 3 if conversion fails
+
+class CourseImpact(NamedTuple):
+    """How much later coursework depends on a course, precomputed per catalog version"""
+    dependents: int     # Courses that transitively need it as a prerequisite
+    longest_chain: int  # Courses in the longest prerequisite chain that starts with it
+    scarce: bool        # Offered in only one semester a year
+
+class CatalogArrays(NamedTuple):
+    """Per-course columns indexed by PrerequisiteGraph id, for the NumPy batch path"""
+    credit_hours: np.ndarray
+    prerequisite_ids: List[np.ndarray]  # Distinct prerequisite ids of each catalog course
+    corequisite_ids: List[np.ndarray]
+    ranked_course_ids: np.ndarray  # Catalog ids in impact order
 
 class KnowledgeBase:
-    def __init__(self, courses_file: str = 'Courses.csv'):
-        self.courses_df = pd.read_csv(courses_file)
-        self.courses_df.fillna('', inplace=True)
-        
+    def __init__(self, courses_file: str = 'Courses.csv', courses_df: pd.DataFrame = None, version=None):
+        """Load the catalog from a CSV file, or from an already loaded DataFrame"""
+        if courses_df is None:
+            with open(courses_file, 'rb') as f:
+                data = f.read()
+            courses_df = pd.read_csv(io.BytesIO(data))
+            # Content hash of the catalog, used to tell reloads apart
+            version = hashlib.sha1(data).hexdigest()
+        self.version = version
+        self.snapshot = None
+        self._catalog_arrays = None
+        # fillna returns a copy, so the caller's DataFrame is left untouched
+        self._courses_df = courses_df.fillna('')
+        self._build_index()
+        if self.version is None:
+            # Catalog caches are keyed on the version, so a DataFrame without one gets a content hash
+            self.version = hashlib.sha1(repr(tuple(self._index.values())).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'KnowledgeBase':
+        """Load a compiled catalog_snapshot.CatalogSnapshot; the DataFrame is only built if asked for
+
+        Records and the bitset graph are decoded into this process; only
+        catalog_arrays() stays backed by the mapped file.
+        """
+        kb = cls.__new__(cls)
+        kb.version = snapshot.version
+        kb.snapshot = snapshot
+        kb._courses_df = None
+        kb._catalog_arrays = None
+
+        codes = snapshot.strings('codes')
+        course_count = snapshot.course_count
+        prerequisite_ids = snapshot.adjacency('prerequisite')
+        corequisite_ids = snapshot.adjacency('corequisite')
+        index = {}
+        for i, (code, name, description, credit_hours, semester) in enumerate(zip(
+                codes, snapshot.strings('names'), snapshot.strings('descriptions'),
+                snapshot.array('credit_hours').tolist(), snapshot.strings('semesters'))):
+            index[code] = CourseRecord(
+                code=code,
+                name=name,
+                description=description,
+                prerequisites=tuple(codes[p] for p in prerequisite_ids[i]),
+                corequisites=tuple(codes[c] for c in corequisite_ids[i]),
+                credit_hours=credit_hours,
+                semester_offered=semester,
+                offered_fall=semester in ('FALL', 'BOTH'),
+                offered_spring=semester in ('SPRING', 'BOTH'),
+            )
+        kb._index = MappingProxyType(index)
+        # Snapshots come from the course store, which has no duplicated codes
+        kb._row_positions = MappingProxyType({code: i for i, code in enumerate(index)})
+        kb._set_semester_codes([(record.code, record.semester_offered) for record in index.values()])
+
+        graph = PrerequisiteGraph.from_ids(codes, course_count, prerequisite_ids, corequisite_ids,
+                                           snapshot.adjacency('cycle'))
+        kb._set_graph(graph, snapshot.array('dependents').tolist(), snapshot.array('longest_chain').tolist(),
+                      snapshot.array('ranked').tolist())
+        return kb
+
+    @property
+    def courses_df(self) -> pd.DataFrame:
+        if self._courses_df is None:
+            self._courses_df = self.snapshot.dataframe()
+        return self._courses_df
+
+    def catalog_arrays(self) -> CatalogArrays:
+        """NumPy columns of the catalog; views into the mapped snapshot when loaded from one"""
+        if self._catalog_arrays is None:
+            snapshot = self.snapshot
+            if snapshot is not None:
+                def split(group):
+                    return np.split(snapshot.array(f'{group}_ids'), snapshot.array(f'{group}_offsets')[1:-1])
+                self._catalog_arrays = CatalogArrays(
+                    snapshot.array('credit_hours'), split('prerequisite'), split('corequisite'),
+                    snapshot.array('ranked'))
+            else:
+                graph = self.prerequisite_graph
+                self._catalog_arrays = CatalogArrays(
+                    np.array([self._index[code].credit_hours for code in graph.codes[:graph.course_count]],
+                             dtype=np.int64),
+                    [np.array(graph.ids_of(mask), dtype=np.intp) for mask in graph.prerequisite_masks],
+                    [np.array(graph.ids_of(mask), dtype=np.intp) for mask in graph.corequisite_masks],
+                    np.array(self.ranked_course_ids, dtype=np.intp))
+        return self._catalog_arrays
+
+    def _build_index(self):
+        """Build the code-keyed course index once so lookups never scan the DataFrame"""
+        index = {}
+        row_positions = {}
+        columns = ['Code', 'Course Name', 'Description', 'prerequisite', 'Co-requisites', 'CH', 'Semester Offered']
+        rows = list(self.courses_df[columns].itertuples(index=False, name=None))
+        for position, (code, name, description, prereqs, coreqs, credit_hours, semester) in enumerate(rows):
+            # Keep the first row for duplicated codes, like the old mask-and-iloc[0] lookups
+            if code in index:
+                continue
+            index[code] = CourseRecord(
+                code=code,
+                name=name,
+                description=description,
+                prerequisites=split_codes(prereqs),
+                corequisites=split_codes(coreqs),
+                credit_hours=_parse_credit_hours(credit_hours),
+                semester_offered=semester,
+                offered_fall=semester in ('FALL', 'BOTH'),
+                offered_spring=semester in ('SPRING', 'BOTH'),
+            )
+            row_positions[code] = position
+
+        self._index: Mapping[str, CourseRecord] = MappingProxyType(index)
+        self._row_positions: Mapping[str, int] = MappingProxyType(row_positions)
+        self._set_semester_codes([(row[0], row[6]) for row in rows])
+
+        # Compiled requirement graph; cycles are reported in prerequisite_graph.cycles
+        graph = PrerequisiteGraph(index.values())
+        dependents, chains = graph.impact()
+        self._set_graph(graph, dependents, chains)
+
+    def _set_semester_codes(self, rows: List[Tuple[str, str]]):
+        """Course codes per semester in catalog order, including courses offered in BOTH"""
+        semesters = {semester for _, semester in rows} | {'FALL', 'SPRING'}
+        self._semester_codes = MappingProxyType({
+            semester: tuple(code for code, offered in rows if offered in (semester, 'BOTH'))
+            for semester in semesters
+        })
+        self._both_codes = tuple(code for code, offered in rows if offered == 'BOTH')
+
+    def _set_graph(self, graph: PrerequisiteGraph, dependents: List[int], chains: List[int],
+                   ranked: Optional[List[int]] = None):
+        self.prerequisite_graph = graph
+        # Impact metrics and the ranking built from them, so requests only sort by a stored key
+        impact = {}
+        for i, code in enumerate(graph.codes[:graph.course_count]):
+            impact[code] = CourseImpact(dependents[i], chains[i], self._index[code].semester_offered != 'BOTH')
+        self._impact: Mapping[str, CourseImpact] = MappingProxyType(impact)
+        if ranked is None:
+            # Longest chain first, then most dependents, then scarcity; ties keep reverse catalog order
+            ranked = sorted(range(graph.course_count), key=lambda i: (
+                -chains[i], -dependents[i], -impact[graph.codes[i]].scarce, -i))
+        self.impact_rank: List[int] = [0] * graph.course_count
+        for position, course_id in enumerate(ranked):
+            self.impact_rank[course_id] = position
+        self.ranked_course_ids: Tuple[int, ...] = tuple(ranked)
+
     def get_all_courses(self) -> pd.DataFrame:
         return self.courses_df
-        
+
+    def get_course_codes(self) -> Tuple[str, ...]:
+        """Get the unique course codes in catalog order"""
+        return tuple(self._index)
+
+    def get_course_record(self, code: str) -> Optional[CourseRecord]:
+        return self._index.get(code)
+
     def get_course_by_code(self, code: str) -> Dict:
-        course = self.courses_df[self.courses_df['Code'] == code]
-        if len(course) == 0:
+        position = self._row_positions.get(code)
+        if position is None:
             return None
-        return course.iloc[0].to_dict()
-        
+        return self.courses_df.iloc[position].to_dict()
+
+    def get_course_impact(self, code: str) -> Optional[CourseImpact]:
+        return self._impact.get(code)
+
+    def rank_courses(self, codes: List[str]) -> List[str]:
+        """Order course codes by impact, highest first; codes outside the catalog go last"""
+        ids = self.prerequisite_graph.ids
+        rank = self.impact_rank
+        last = len(rank)
+        return sorted(codes, key=lambda code: rank[ids[code]] if ids.get(code, last) < last else last)
+
     def get_prerequisites(self, course_code: str) -> List[str]:
-        course = self.courses_df[self.courses_df['Code'] == course_code]
-        if course.empty or pd.isna(course.iloc[0]['prerequisite']):
-            return []
-        prereqs = course.iloc[0]['prerequisite']
-        if isinstance(prereqs, str):
-            return [p.strip() for p in prereqs.split(',') if p.strip()]
-        return []
-        
+        course = self._index.get(course_code)
+        return list(course.prerequisites) if course else []
+
     def get_corequisites(self, course_code: str) -> List[str]:
-        course = self.courses_df[self.courses_df['Code'] == course_code]
-        if course.empty or pd.isna(course.iloc[0]['Co-requisites']):
-            return []
-        coreqs = course.iloc[0]['Co-requisites']
-        if isinstance(coreqs, str):
-            return [c.strip() for c in coreqs.split(',') if c.strip()]
-        return []
-        
+        course = self._index.get(course_code)
+        return list(course.corequisites) if course else []
+
     def get_credit_hours(self, course_code: str) -> int:
-        course = self.courses_df[self.courses_df['Code'] == course_code]
-        if not course.empty:
-            try:
-                return int(float(course.iloc[0]['CH']))
-            except (ValueError, TypeError):
-                return 3  # Default to 3 if conversion fails
-        return 3
-        
+        course = self._index.get(course_code)
+        return course.credit_hours if course else 3
+
     def get_semester_offered(self, course_code: str) -> str:
-        course = self.courses_df[self.courses_df['Code'] == course_code]
-        return course.iloc[0]['Semester Offered'] if not course.empty else None
-        
+        course = self._index.get(course_code)
+        return course.semester_offered if course else None
+
+    def get_semester_courses(self, semester: str) -> Tuple[str, ...]:
+        """Get the catalog courses offered in a semester (including BOTH), in catalog order"""
+        return self._semester_codes.get(semester, self._both_codes)
+
     def get_available_courses(self, semester: str, failed_courses: Set[str] = None) -> List[str]:
         """Get available courses, prioritizing failed courses if provided"""
         available_courses = []
-        
+
         # Always add failed courses first, regardless of semester
         if failed_courses:
             available_courses.extend(list(failed_courses))
-            
+
         # Then add semester-specific courses
-        semester_mask = (self.courses_df['Semester Offered'] == semester) | (self.courses_df['Semester Offered'] == 'BOTH')
-        semester_courses = self.courses_df[semester_mask]['Code'].tolist()
-        
+        semester_courses = self.get_semester_courses(semester)
+
         # Add semester courses that aren't failed courses
         available_courses.extend([c for c in semester_courses if c not in available_courses])
-        
+
         return available_courses
-        
+
+    def get_eligible_courses(self, semester: str, passed_courses: Set[str], current_courses: Set[str] = ()) -> List[str]:
+        """Get every catalog course offered in the semester whose prerequisites and co-requisites are met"""
+        graph = self.prerequisite_graph
+        eligible = graph.eligible(graph.mask_of(passed_courses), graph.mask_of(current_courses))
+        return [code for code in graph.codes_of(eligible) if self._index[code].is_offered(semester)]
+
+    def get_blocked_courses(self, course_code: str) -> List[str]:
+        """Get every course that transitively depends on course_code as a prerequisite"""
+        return self.prerequisite_graph.blocked_by(course_code)
+
     def get_credit_limit(self, cgpa: float) -> int:
         """Get maximum allowed credit hours based on CGPA"""
         if cgpa < 2.00:
@@ -71,34 +279,73 @@ class KnowledgeBase:
             return 20  # Strict limit for CGPA between 2.00 and 3.00
         else:  # cgpa >= 3.00
             return 22
-            
+
     def check_prerequisites_met(self, course_code: str, passed_courses: Set[str]) -> bool:
-        prerequisites = self.get_prerequisites(course_code)
-        if not prerequisites:
+        course = self._index.get(course_code)
+        if not course:
             return True
-        return all(prereq in passed_courses for prereq in prerequisites)
-        
+        return all(prereq in passed_courses for prereq in course.prerequisites)
+
     def check_corequisites_available(self, course_code: str, passed_courses: Set[str], current_courses: Set[str]) -> bool:
-        corequisites = self.get_corequisites(course_code)
-        if not corequisites:
+        course = self._index.get(course_code)
+        if not course:
             return True
-        return all(coreq in passed_courses or coreq in current_courses for coreq in corequisites)
-        
+        return all(coreq in passed_courses or coreq in current_courses for coreq in course.corequisites)
+
     def is_course_available(self, course_code: str, semester: str, passed_courses: Set[str], current_courses: Set[str], is_failed_course: bool = False) -> bool:
         """Check if a course is available to take"""
-        course = self.courses_df[self.courses_df['Code'] == course_code]
-        if not course.empty:
+        course = self._index.get(course_code)
+        if course:
             # For failed courses, ignore semester restrictions and be lenient with prerequisites
             if is_failed_course:
                 return True  # Always allow failed courses to be retaken
-            
+
             # For regular courses, apply normal restrictions
-            semester_offered = course.iloc[0]['Semester Offered']
-            if semester_offered not in [semester, 'BOTH']:
+            if not course.is_offered(semester):
                 return False
-            
-            prereqs_met = self.check_prerequisites_met(course_code, passed_courses)
-            coreqs_available = self.check_corequisites_available(course_code, passed_courses, current_courses)
-            
+
+            prereqs_met = all(prereq in passed_courses for prereq in course.prerequisites)
+            coreqs_available = all(coreq in passed_courses or coreq in current_courses
+                                   for coreq in course.corequisites)
+
             return prereqs_met and coreqs_available
-        return False 
\ No newline at end of file
+        return False
+
+# One shared KnowledgeBase per catalog file, keyed by absolute path
+_shared_lock = threading.Lock()
+_shared_knowledge_bases: Dict[str, KnowledgeBase] = {}
+# Callbacks that drop catalog-derived data when a new catalog version is loaded
+_catalog_listeners: List[Callable[[KnowledgeBase], None]] = []
+
+def add_catalog_listener(callback: Callable[[KnowledgeBase], None]):
+    """Call `callback(kb)` whenever get_knowledge_base loads a new catalog version"""
+    _catalog_listeners.append(callback)
+
+def get_knowledge_base(courses_file: str = 'Courses.csv') -> KnowledgeBase:
+    """Get the process-wide KnowledgeBase, reloading it only when the catalog version changes
+
+    The catalog is read from the CourseStore behind `courses_file`, so edits
+    made through admin_app.py (or to the CSV itself) are picked up by every
+    process on its next call. Only then are the catalog listeners notified,
+    so caches of unrelated data are never thrown away.
+    """
+    path = os.path.abspath(courses_file)
+    store = get_course_store(path)
+    version = store.version()
+    with _shared_lock:
+        kb = _shared_knowledge_bases.get(path)
+        if kb is not None and kb.version == version:
+            return kb
+        snapshot = None
+        if USE_CATALOG_SNAPSHOT:
+            from catalog_snapshot import get_snapshot
+            snapshot = get_snapshot(store, version)
+        if snapshot is not None:
+            kb = KnowledgeBase.from_snapshot(snapshot)
+        else:
+            version, courses_df = store.snapshot()
+            kb = KnowledgeBase(courses_df=courses_df, version=version)
+        _shared_knowledge_bases[path] = kb
+    for callback in _catalog_listeners:
+        callback(kb)
+    return kb
\ No newline at end of file
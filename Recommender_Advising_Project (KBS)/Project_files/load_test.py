@@ -0,0 +1,117 @@
+"""Load test for advisor_service.py.
+
+Opens `--clients` keep-alive connections and sends `--requests` requests on
+each, using random student profiles from the current catalog:
+
+    python load_test.py --spawn --clients 32 --requests 100
+    python load_test.py --port 8080 --endpoint explanations
+
+With --spawn the service is started on --port for the duration of the test.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmark import random_profiles
+
+async def _request(reader, writer, host: str, path: str, body: bytes) -> int:
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def _client(host: str, port: int, path: str, profiles: List[Dict], latencies: List[float], errors: List[int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for profile in profiles:
+            body = json.dumps(profile).encode('utf-8')
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, path, body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, endpoint: str, clients: int, requests: int, seed: int) -> Dict[str, float]:
+    profiles = random_profiles(clients * requests, seed)
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, f'/{endpoint}', profiles[i * requests:(i + 1) * requests], latencies, errors)
+        for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+async def _wait_until_up(host: str, port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the advisor HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--endpoint', choices=['recommendations', 'explanations'], default='recommendations')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help="requests per client")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="start advisor_service.py for the test")
+    parser.add_argument('--workers', type=int, default=None, help="service workers when using --spawn")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, 'advisor_service.py', '--host', args.host, '--port', str(args.port)]
+        if args.workers:
+            command += ['--workers', str(args.workers)]
+        server = subprocess.Popen(command)
+    try:
+        asyncio.run(_wait_until_up(args.host, args.port))
+        results = asyncio.run(run_load(args.host, args.port, args.endpoint, args.clients, args.requests, args.seed))
+    finally:
+        if server is not None:
+            # SIGINT lets the service shut its worker pool down; terminate only if it hangs
+            server.send_signal(signal.SIGINT if os.name != 'nt' else signal.SIGTERM)
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.terminate()
+                server.wait()
+    print("  ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in results.items()))
+
+if __name__ == "__main__":
+    main()
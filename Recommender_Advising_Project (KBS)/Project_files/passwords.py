@@ -0,0 +1,94 @@
+"""Password hashing for student accounts.
+
+Hashes are self-describing strings, so the KDF and its cost can change
+without a migration:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+
+Anything else is treated as a legacy plaintext password from users.json.
+needs_rehash() reports hashes that do not match the current settings so
+callers can upgrade them after a successful login. The cost is read from
+the environment:
+
+    ADVISOR_PASSWORD_SCHEME       scrypt (default) or pbkdf2_sha256
+    ADVISOR_SCRYPT_N              scrypt CPU/memory cost, a power of two (default 16384)
+    ADVISOR_PBKDF2_ITERATIONS     PBKDF2 iterations (default 600000)
+"""
+import base64
+import hashlib
+import hmac
+import os
+from typing import Optional
+
+from ttl_cache import TTLCache
+
+PASSWORD_SCHEME = os.environ.get('ADVISOR_PASSWORD_SCHEME', 'scrypt')
+SCRYPT_N = int(os.environ.get('ADVISOR_SCRYPT_N', 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get('ADVISOR_PBKDF2_ITERATIONS', 600000))
+
+_SALT_BYTES = 16
+_HASH_BYTES = 32
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=2 * 128 * r * (n + p + 2), dklen=_HASH_BYTES)
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, dklen=_HASH_BYTES)
+
+def hash_password(password: str, scheme: Optional[str] = None) -> str:
+    """Hash a password with the configured (or given) scheme and a random salt"""
+    scheme = scheme or PASSWORD_SCHEME
+    salt = os.urandom(_SALT_BYTES)
+    if scheme == 'scrypt':
+        digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    if scheme == 'pbkdf2_sha256':
+        digest = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+def _check(password: str, stored: str) -> bool:
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, base64.b64decode(parts[4]), n, r, p)
+            return hmac.compare_digest(digest, base64.b64decode(parts[5]))
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            digest = _pbkdf2(password, base64.b64decode(parts[2]), int(parts[1]))
+            return hmac.compare_digest(digest, base64.b64decode(parts[3]))
+    except ValueError:
+        return False
+    # Legacy plaintext password
+    return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+
+# Recently verified (hash, password) pairs, so Streamlit reruns and repeated
+# logins skip the KDF. Keys are keyed digests, never the password itself, and
+# only successful checks are cached so guessing still pays the full cost.
+_cache_key = os.urandom(32)
+_verified = TTLCache(maxsize=4096, ttl=300.0)
+
+def verify_password(password: str, stored: str, use_cache: bool = True) -> bool:
+    """Check a password against a stored hash (or legacy plaintext)"""
+    if not stored:
+        return False
+    key = hmac.new(_cache_key, f"{stored}\0{password}".encode('utf-8'), hashlib.sha256).digest()
+    if use_cache and _verified.get(key):
+        return True
+    ok = _check(password, stored)
+    if ok and use_cache:
+        _verified.put(key, True)
+    return ok
+
+def needs_rehash(stored: str) -> bool:
+    """True if the stored value is plaintext or was hashed with other settings"""
+    if PASSWORD_SCHEME == 'scrypt':
+        return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+    return not stored.startswith(f"pbkdf2_sha256${PBKDF2_ITERATIONS}$")
\ No newline at end of file
@@ -0,0 +1,231 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits of a bitset"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class PrerequisiteGraph:
+    """Compiled prerequisite/co-requisite graph over integer course ids.
+
+    Catalog courses get ids 0..n-1 in catalog order, and codes that are only
+    referenced as requirements (e.g. "Senior Standing") get the ids after them.
+    A set of courses is a Python int with bit ``id`` set for each member.
+    """
+
+    def __init__(self, records: Iterable):
+        """Build the graph from KnowledgeBase CourseRecord entries"""
+        records = list(records)
+        self.codes: List[str] = [record.code for record in records]
+        self.ids: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.course_count = len(self.codes)
+        self.catalog_mask = (1 << self.course_count) - 1
+
+        self.prerequisite_masks: List[int] = [self._requirement_mask(r.prerequisites) for r in records]
+        self.corequisite_masks: List[int] = [self._requirement_mask(r.corequisites) for r in records]
+        self._link()
+        self.cycles: List[Tuple[str, ...]] = self._find_cycles()
+
+    @classmethod
+    def from_ids(cls, codes: List[str], course_count: int, prerequisite_ids: Iterable[Iterable[int]],
+                 corequisite_ids: Iterable[Iterable[int]], cycles: Iterable[Iterable[int]]) -> 'PrerequisiteGraph':
+        """Rebuild a graph from the id lists stored in a catalog snapshot, without re-parsing codes"""
+        graph = cls.__new__(cls)
+        graph.codes = list(codes)
+        graph.ids = {code: i for i, code in enumerate(graph.codes)}
+        graph.course_count = course_count
+        graph.catalog_mask = (1 << course_count) - 1
+        graph.prerequisite_masks = [sum(1 << i for i in set(ids)) for ids in prerequisite_ids]
+        graph.corequisite_masks = [sum(1 << i for i in set(ids)) for ids in corequisite_ids]
+        graph._link()
+        graph.cycles = [tuple(graph.codes[i] for i in cycle) for cycle in cycles]
+        return graph
+
+    def _link(self):
+        """Derive the reverse edges and lookup caches from the requirement masks"""
+        # Reverse edges: for each id, the courses that require it
+        self.dependent_masks: List[int] = [0] * len(self.codes)
+        self.codependent_masks: List[int] = [0] * len(self.codes)
+        for course_id in range(self.course_count):
+            for prereq_id in iter_bits(self.prerequisite_masks[course_id]):
+                self.dependent_masks[prereq_id] |= 1 << course_id
+            for coreq_id in iter_bits(self.corequisite_masks[course_id]):
+                self.codependent_masks[coreq_id] |= 1 << course_id
+
+        # Every id that appears as a prerequisite / co-requisite of some course
+        self._prerequisite_universe = 0
+        self._corequisite_universe = 0
+        for mask in self.prerequisite_masks:
+            self._prerequisite_universe |= mask
+        for mask in self.corequisite_masks:
+            self._corequisite_universe |= mask
+
+        self._dependents_cache: Dict[str, int] = {}
+        self._prerequisites_cache: Dict[str, int] = {}
+
+    def _requirement_mask(self, codes: Iterable[str]) -> int:
+        mask = 0
+        for code in codes:
+            course_id = self.ids.get(code)
+            if course_id is None:
+                course_id = self.ids[code] = len(self.codes)
+                self.codes.append(code)
+            mask |= 1 << course_id
+        return mask
+
+    def mask_of(self, codes: Iterable[str]) -> int:
+        """Convert course codes to a bitset, ignoring codes the graph doesn't know"""
+        ids = self.ids
+        mask = 0
+        for code in codes:
+            course_id = ids.get(code)
+            if course_id is not None:
+                mask |= 1 << course_id
+        return mask
+
+    def ids_of(self, mask: int) -> List[int]:
+        """Convert a bitset to the list of course ids it contains"""
+        return list(iter_bits(mask))
+
+    def codes_of(self, mask: int) -> List[str]:
+        """Convert a bitset back to course codes in catalog order"""
+        return [self.codes[i] for i in iter_bits(mask)]
+
+    def prerequisites_met(self, passed_mask: int) -> int:
+        """Bitset of catalog courses whose prerequisites are all in passed_mask"""
+        blocked = 0
+        for missing_id in iter_bits(self._prerequisite_universe & ~passed_mask):
+            blocked |= self.dependent_masks[missing_id]
+        return self.catalog_mask & ~blocked
+
+    def corequisites_met(self, taken_mask: int) -> int:
+        """Bitset of catalog courses whose co-requisites are all passed or currently taken"""
+        blocked = 0
+        for missing_id in iter_bits(self._corequisite_universe & ~taken_mask):
+            blocked |= self.codependent_masks[missing_id]
+        return self.catalog_mask & ~blocked
+
+    def eligible(self, passed_mask: int, current_mask: int = 0) -> int:
+        """Bitset of catalog courses with prerequisites and co-requisites satisfied"""
+        return self.prerequisites_met(passed_mask) & self.corequisites_met(passed_mask | current_mask)
+
+    def is_eligible(self, code: str, prerequisites_met: int, taken_mask: Optional[int]) -> bool:
+        """Check one course against a precomputed prerequisites_met() bitset
+
+        Co-requisites must be in taken_mask; pass None to skip that check.
+        """
+        course_id = self.ids.get(code)
+        if course_id is None or course_id >= self.course_count:
+            return False
+        if not prerequisites_met >> course_id & 1:
+            return False
+        return taken_mask is None or not self.corequisite_masks[course_id] & ~taken_mask
+
+    def _closure(self, code: str, edges: List[int], cache: Dict[str, int]) -> int:
+        cached = cache.get(code)
+        if cached is not None:
+            return cached
+        course_id = self.ids.get(code)
+        if course_id is None:
+            return 0
+        seen = 0
+        frontier = edges[course_id] if course_id < len(edges) else 0
+        while frontier:
+            seen |= frontier
+            next_frontier = 0
+            for next_id in iter_bits(frontier):
+                if next_id < len(edges):
+                    next_frontier |= edges[next_id]
+            frontier = next_frontier & ~seen
+        cache[code] = seen
+        return seen
+
+    def impact(self) -> Tuple[List[int], List[int]]:
+        """Per catalog id: how many courses transitively need it, and the longest prerequisite chain it starts
+
+        Computed in one pass from the last courses of each chain back to
+        their prerequisites. Courses on or behind a prerequisite cycle get
+        their dependent count from a direct closure, and their chain length
+        ignores the cycle.
+        """
+        n = self.course_count
+        closures = [0] * n
+        chains = [1] * n
+        done = 0
+        waiting = [bin(self.dependent_masks[i]).count('1') for i in range(n)]
+        ready = [i for i in range(n) if waiting[i] == 0]
+        while ready:
+            i = ready.pop()
+            done |= 1 << i
+            closure = 0
+            for d in iter_bits(self.dependent_masks[i]):
+                closure |= (1 << d) | closures[d]
+                chains[i] = max(chains[i], 1 + chains[d])
+            closures[i] = closure
+            for p in iter_bits(self.prerequisite_masks[i] & self.catalog_mask):
+                waiting[p] -= 1
+                if waiting[p] == 0:
+                    ready.append(p)
+        counts = [bin(closure).count('1') for closure in closures]
+        for i in iter_bits(self.catalog_mask & ~done):
+            counts[i] = bin(self._closure(self.codes[i], self.dependent_masks, self._dependents_cache)).count('1')
+            chains[i] = 1 + max((chains[d] for d in iter_bits(self.dependent_masks[i] & done)), default=0)
+        return counts, chains
+
+    def blocked_by(self, code: str) -> List[str]:
+        """All courses that transitively need `code` as a prerequisite"""
+        return self.codes_of(self._closure(code, self.dependent_masks, self._dependents_cache))
+
+    def all_prerequisites(self, code: str) -> List[str]:
+        """All courses `code` transitively requires as prerequisites"""
+        return self.codes_of(self._closure(code, self.prerequisite_masks, self._prerequisites_cache))
+
+    def _find_cycles(self) -> List[Tuple[str, ...]]:
+        """Find prerequisite cycles (Tarjan's strongly connected components)"""
+        index_of: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        stack: List[int] = []
+        on_stack = set()
+        cycles = []
+        counter = 0
+
+        for root in range(self.course_count):
+            if root in index_of:
+                continue
+            work = [(root, iter(iter_bits(self.prerequisite_masks[root])))]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child >= self.course_count:
+                        continue
+                    if child not in index_of:
+                        index_of[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(iter_bits(self.prerequisite_masks[child]))))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index_of[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index_of[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or self.prerequisite_masks[node] >> node & 1:
+                            cycles.append(tuple(sorted(self.codes[i] for i in component)))
+        return cycles
@@ -0,0 +1,31 @@
+from typing import Hashable, Optional
+
+from ttl_cache import TTLCache
+
+class RecommendationCache(TTLCache):
+    """TTLCache of recommendation results, tied to one catalog version.
+
+    Entries are stored together with the catalog version they were computed
+    from; reading or writing with a different version drops everything, so
+    a catalog edit can never serve stale recommendations.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        super().__init__(maxsize, ttl)
+        self._version = None
+
+    def _check_version(self, version: Hashable):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[object]:
+        """Return the cached value for key, or None if missing, expired or from another version"""
+        with self._lock:
+            self._check_version(version)
+            return self._get(key)
+
+    def put(self, key: Hashable, version: Hashable, value: object):
+        with self._lock:
+            self._check_version(version)
+            self._put(key, value)
@@ -0,0 +1,133 @@
+"""Structured recommendation results.
+
+get_recommendation_result() in inference_engine.py returns a
+RecommendationResult: the recommended courses as RecommendedCourse records
+that already carry the catalog name, credit hours and reason flags, plus
+the explanation texts, rendered only when read. Consumers can show a result
+without looking anything up in the catalog again, and the result converts to
+plain dicts for JSON, or for msgpack when that package is installed:
+
+    result = get_recommendation_result('FALL', 3.1, passed, failed)
+    for course in result.courses:
+        print(course.code, course.name, course.credit_hours, course.failed_retake)
+    payload = result.to_json(explain=True)
+    same = RecommendationResult.from_json(payload)
+"""
+import json
+from typing import Dict, List, Mapping, Optional, Tuple
+
+class RecommendedCourse:
+    """One recommended course with the catalog fields and reasons needed to show it"""
+    __slots__ = ('code', 'name', 'description', 'credit_hours', 'semester_offered',
+                 'failed_retake', 'prerequisites_met', 'corequisites_satisfied')
+
+    def __init__(self, code: str, name: str, description: str, credit_hours: int, semester_offered: str,
+                 failed_retake: bool, prerequisites_met: bool, corequisites_satisfied: bool):
+        self.code = code
+        self.name = name
+        self.description = description
+        self.credit_hours = credit_hours
+        self.semester_offered = semester_offered
+        self.failed_retake = failed_retake
+        self.prerequisites_met = prerequisites_met
+        self.corequisites_satisfied = corequisites_satisfied
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RecommendedCourse':
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RecommendedCourse) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"RecommendedCourse({self.code!r}, {self.name!r}, {self.credit_hours})"
+
+class RecommendationResult:
+    """Recommendations for one student, in recommendation order"""
+    __slots__ = ('semester', 'cgpa', 'credit_limit', 'total_credits', 'courses', 'explanations')
+
+    def __init__(self, semester: str, cgpa: float, credit_limit: int, total_credits: int,
+                 courses: Tuple[RecommendedCourse, ...], explanations: Optional[Dict] = None):
+        self.semester = semester
+        self.cgpa = cgpa
+        self.credit_limit = credit_limit
+        self.total_credits = total_credits
+        self.courses = tuple(courses)
+        # get_course_recommendations' explanation dict; its course texts may still be unrendered
+        self.explanations = explanations
+
+    @property
+    def codes(self) -> List[str]:
+        return [course.code for course in self.courses]
+
+    def explanation(self, code: str) -> Dict[str, str]:
+        """Explanation texts of one recommended course, rendered on first access"""
+        if self.explanations is None:
+            raise KeyError(code)
+        return self.explanations['courses'][code]
+
+    def as_tuple(self) -> Tuple[List[str], Dict, int]:
+        """The (courses, explanations, total_credits) form returned by get_course_recommendations"""
+        return self.codes, self.explanations, self.total_credits
+
+    def to_dict(self, explain: bool = False) -> Dict:
+        """Plain data for JSON/msgpack; `explain` renders and includes every explanation text"""
+        data = {
+            'semester': self.semester,
+            'cgpa': self.cgpa,
+            'recommended_courses': self.codes,
+            'total_credits': self.total_credits,
+            'credit_limit': self.credit_limit,
+            'courses': [course.to_dict() for course in self.courses],
+        }
+        if explain and self.explanations is not None:
+            data['explanations'] = {
+                'credit_limit': self.explanations['credit_limit'],
+                'failed_courses_summary': self.explanations['failed_courses_summary'],
+                'courses': {code: dict(texts) for code, texts in self.explanations['courses'].items()},
+            }
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'RecommendationResult':
+        return cls(
+            semester=data['semester'],
+            cgpa=data['cgpa'],
+            credit_limit=data['credit_limit'],
+            total_credits=data['total_credits'],
+            courses=tuple(RecommendedCourse.from_dict(course) for course in data['courses']),
+            explanations=data.get('explanations'),
+        )
+
+    def to_json(self, explain: bool = False) -> str:
+        return json.dumps(self.to_dict(explain), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text) -> 'RecommendationResult':
+        return cls.from_dict(json.loads(text))
+
+    def to_msgpack(self, explain: bool = False) -> bytes:
+        """Pack with msgpack (optional dependency, imported on use)"""
+        import msgpack
+        return msgpack.packb(self.to_dict(explain), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> 'RecommendationResult':
+        import msgpack
+        return cls.from_dict(msgpack.unpackb(payload, raw=False))
+
+    def __getstate__(self):
+        # Pickled with rendered texts, since the lazy mapping holds a closure
+        return self.to_dict(explain=True)
+
+    def __setstate__(self, state):
+        other = RecommendationResult.from_dict(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def __repr__(self) -> str:
+        return (f"RecommendationResult({self.semester!r}, {self.cgpa}, codes={self.codes}, "
+                f"total_credits={self.total_credits})")
@@ -0,0 +1,140 @@
+"""Constant-memory pipeline for advising student exports.
+
+read_students() yields profiles from a CSV or JSONL file, chunked() groups
+them into fixed-size lists, advise_stream() advises one chunk at a time
+(optionally in a process pool) and yields output records in input order,
+and RecommendationWriter appends them to a JSONL or CSV file. At most two
+chunks are held in memory, however large the input is:
+
+    with RecommendationWriter('out.jsonl', explain=True) as writer:
+        writer.write_all(advise_stream(read_students('students.csv'), explain=True))
+
+Input CSV columns are semester, cgpa, passed_courses and failed_courses
+(comma-separated course lists); JSONL lines are objects with the same
+keys. An optional student_id is copied to the output.
+"""
+import csv
+import functools
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from knowledge_base import get_knowledge_base, split_codes
+
+OUTPUT_FIELDS = ['student_id', 'semester', 'cgpa', 'recommended_courses', 'total_credits', 'credit_limit', 'error']
+
+def _code_list(value) -> List[str]:
+    if isinstance(value, str):
+        return list(split_codes(value))
+    return list(value or [])
+
+def read_students(path: str) -> Iterator[Dict]:
+    """Yield student profiles from a CSV or JSONL file, one at a time"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            yield {
+                'student_id': record.get('student_id', ''),
+                'semester': str(record.get('semester', '')).strip().upper(),
+                'cgpa': record.get('cgpa'),
+                'passed_courses': _code_list(record.get('passed_courses')),
+                'failed_courses': _code_list(record.get('failed_courses')),
+            }
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most `size` items without reading ahead"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def explanation_text(explanations: Dict, courses: List[str]) -> str:
+    """Flatten an explanation dict into plain text, in the order app.py shows it"""
+    lines = [explanations['credit_limit'], explanations['failed_courses_summary']]
+    for course in courses:
+        texts = explanations['courses'][course]
+        lines.append(f"{course}:")
+        lines.extend(f"  {texts[part]}" for part in ('failed_priority', 'prerequisites', 'corequisites', 'semester')
+                     if texts[part])
+    return '\n'.join(lines)
+
+def init_worker():
+    """Pool initializer: load the catalog once per worker, before its first student"""
+    get_knowledge_base()
+
+def advise_profile(profile: Dict, explain: bool = False) -> Dict:
+    """Recommendations for one profile as an output record; bad input is reported in 'error'"""
+    from inference_engine import get_recommendation_result
+
+    result = {'student_id': profile['student_id'], 'semester': profile['semester'], 'cgpa': profile['cgpa']}
+    try:
+        advice = get_recommendation_result(
+            profile['semester'], float(profile['cgpa']), profile['passed_courses'], profile['failed_courses'])
+        result.update(recommended_courses=advice.codes, total_credits=advice.total_credits,
+                      credit_limit=advice.credit_limit)
+        if explain:
+            result['explanation'] = explanation_text(advice.explanations, advice.codes)
+    except (TypeError, ValueError) as e:
+        result['error'] = str(e)
+    return result
+
+def advise_stream(profiles: Iterable[Dict], chunk_size: int = 1000, explain: bool = False,
+                  pool=None) -> Iterator[Dict]:
+    """
+    Advise profiles chunk by chunk and yield output records in input order
+
+    With a multiprocessing pool, the next chunk is already being advised
+    while the records of the previous one are consumed.
+    """
+    work = functools.partial(advise_profile, explain=explain)
+    pending = None
+    for chunk in chunked(profiles, chunk_size):
+        if pool is None:
+            yield from map(work, chunk)
+            continue
+        submitted = pool.map_async(work, chunk, chunksize=max(1, len(chunk) // (4 * (os.cpu_count() or 1))))
+        if pending is not None:
+            yield from pending.get()
+        pending = submitted
+    if pending is not None:
+        yield from pending.get()
+
+class RecommendationWriter:
+    """Appends output records to a JSONL or CSV file (picked by extension) as they arrive"""
+
+    def __init__(self, path: str, explain: bool = False):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.csv = None
+        self.count = 0
+        if path.endswith('.csv'):
+            fields = OUTPUT_FIELDS + ['explanation'] if explain else OUTPUT_FIELDS
+            self.csv = csv.DictWriter(self.file, fieldnames=fields, extrasaction='ignore')
+            self.csv.writeheader()
+
+    def write(self, record: Dict):
+        if self.csv is not None:
+            row = dict(record)
+            row['recommended_courses'] = ', '.join(record.get('recommended_courses', []))
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict]):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Co-requisite groups larger than this are not enumerated subset by subset
+MAX_GROUP_SIZE = 10
+
+def course_priority(kb, code: str) -> int:
+    """Priority score of a course: 1 plus the number of courses it transitively unblocks"""
+    impact = kb.get_course_impact(code)
+    return 1 + (impact.dependents if impact is not None else len(kb.prerequisite_graph.blocked_by(code)))
+
+def _corequisite_groups(kb, candidates: List[str], taken: Set[str]) -> Tuple[List[List[str]], Dict[str, Set[str]]]:
+    """Split candidates into groups linked by co-requisites that are still unmet"""
+    candidate_set = set(candidates)
+    needs = {}
+    parent = {code: code for code in candidates}
+
+    def find(code):
+        while parent[code] != code:
+            parent[code] = parent[parent[code]]
+            code = parent[code]
+        return code
+
+    for code in candidates:
+        unmet = {c for c in kb.get_corequisites(code) if c not in taken}
+        needs[code] = unmet
+        for coreq in unmet & candidate_set:
+            parent[find(coreq)] = find(code)
+
+    groups: Dict[str, List[str]] = {}
+    for code in candidates:
+        groups.setdefault(find(code), []).append(code)
+    return sorted(groups.values(), key=lambda g: g[0]), needs
+
+def _group_options(kb, group: List[str], needs: Dict[str, Set[str]], priorities: Dict[str, int]) -> Iterable[Tuple[int, int, Tuple[str, ...]]]:
+    """Every non-empty subset of a group that carries its own co-requisites, as (credits, priority, codes)"""
+    if len(group) > MAX_GROUP_SIZE:
+        # Too many combinations: only offer the courses that need nothing else this term
+        for code in group:
+            if not needs[code]:
+                yield kb.get_credit_hours(code), priorities[code], (code,)
+        return
+    for bits in range(1, 1 << len(group)):
+        subset = [code for i, code in enumerate(group) if bits >> i & 1]
+        members = set(subset)
+        if all(needs[code] <= members for code in subset):
+            yield (sum(kb.get_credit_hours(code) for code in subset),
+                   sum(priorities[code] for code in subset),
+                   tuple(subset))
+
+def optimize_selection(kb, candidates: List[str], budget: int, taken: Set[str]) -> List[str]:
+    """
+    Pick the best set of courses that fits in `budget` credit hours
+
+    Solves a grouped 0/1 knapsack by dynamic programming over the credit
+    budget: the chosen set uses as many credit hours as possible and, among
+    equally full schedules, maximizes the total course_priority. A course
+    whose co-requisites are not in `taken` (passed or already scheduled) is
+    only chosen together with them.
+
+    `candidates` must already satisfy semester and prerequisite rules.
+    """
+    if budget <= 0 or not candidates:
+        return []
+    candidates = sorted(set(candidates))
+    priorities = {code: course_priority(kb, code) for code in candidates}
+    groups, needs = _corequisite_groups(kb, candidates, taken)
+
+    # best[b] = ((credits, priority), chosen codes) using at most b credit hours
+    best = [((0, 0), ())] * (budget + 1)
+    for group in groups:
+        options = [option for option in _group_options(kb, group, needs, priorities)
+                   if 0 <= option[0] <= budget]
+        if not options:
+            continue
+        updated = list(best)
+        for credits, priority, codes in options:
+            for b in range(credits, budget + 1):
+                (used, score), chosen = best[b - credits]
+                value = (used + credits, score + priority)
+                if value > updated[b][0]:
+                    updated[b] = (value, chosen + codes)
+        best = updated
+
+    selected = best[budget][1]
+    return sorted(selected, key=lambda code: (-priorities[code], code))
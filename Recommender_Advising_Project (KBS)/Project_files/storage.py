@@ -0,0 +1,38 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+def open_database(path: str) -> sqlite3.Connection:
+    """Open an SQLite database tuned for many readers and occasional writers"""
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    # WAL lets readers keep going while a write is in progress
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('PRAGMA busy_timeout=30000')
+    return connection
+
+class Database:
+    """One SQLite connection per thread for a database file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = open_database(self.path)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements atomically, taking the write lock up front"""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
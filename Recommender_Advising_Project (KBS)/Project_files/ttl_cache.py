@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable) -> Optional[object]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _put(self, key: Hashable, value: object):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key: Hashable, value: object):
+        with self._lock:
+            self._put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
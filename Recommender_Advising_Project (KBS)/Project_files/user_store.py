@@ -0,0 +1,107 @@
+"""SQLite-backed student accounts.
+
+Replaces users.json: logins are single-row lookups by student ID and
+signups are atomic inserts, so concurrent signups can no longer overwrite
+each other. Passwords are stored as hashes (see passwords.py); plaintext
+passwords imported from users.json are hashed on their first login. A new
+store is seeded from users.json once; the import can also be run by hand:
+
+    python user_store.py import   # copy users.json into users.db
+"""
+import argparse
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from passwords import hash_password, needs_rehash, verify_password
+from storage import Database
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    student_id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL
+);
+"""
+
+class UserStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = Database(db_path)
+        self.db.connection.executescript(_SCHEMA)
+
+    def get_user(self, student_id: str) -> Optional[Dict]:
+        """Look up one account by student ID"""
+        row = self.db.connection.execute(
+            "SELECT email, password FROM users WHERE student_id = ?", (student_id,)).fetchone()
+        return {'email': row[0], 'password': row[1]} if row else None
+
+    def add_user(self, student_id: str, email: str, password: str) -> bool:
+        """Create an account with a hashed password; returns False if the student ID is already taken"""
+        if self.get_user(student_id) is not None:
+            return False
+        password_hash = hash_password(password)
+        with self.db.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO users (student_id, email, password) VALUES (?, ?, ?) "
+                "ON CONFLICT(student_id) DO NOTHING",
+                (student_id, email, password_hash))
+            return cursor.rowcount == 1
+
+    def authenticate(self, student_id: str, password: str) -> bool:
+        """Check a login, upgrading the stored hash if it uses old settings"""
+        user = self.get_user(student_id)
+        if user is None or not verify_password(password, user['password']):
+            return False
+        if needs_rehash(user['password']):
+            password_hash = hash_password(password)
+            with self.db.transaction() as connection:
+                # Only replace the value we verified, in case it changed meanwhile
+                connection.execute("UPDATE users SET password = ? WHERE student_id = ? AND password = ?",
+                                   (password_hash, student_id, user['password']))
+        return True
+
+    def count(self) -> int:
+        return self.db.connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def import_json(self, json_path: str) -> int:
+        """Copy accounts from a users.json file; existing student IDs are kept. Returns the number added"""
+        with open(json_path, 'r') as f:
+            users = json.load(f)
+        rows = [(student_id, user.get('email', ''), user.get('password', ''))
+                for student_id, user in users.items()]
+        with self.db.transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO users (student_id, email, password) VALUES (?, ?, ?)", rows)
+            return connection.total_changes - before
+
+# One store per database file
+_stores_lock = threading.Lock()
+_stores: Dict[str, UserStore] = {}
+
+def get_user_store(db_file: str = 'users.db', json_file: str = 'users.json') -> UserStore:
+    """Get the process-wide UserStore, seeding a new database from json_file"""
+    db_path = os.path.abspath(db_file)
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = UserStore(db_path)
+            if store.count() == 0 and os.path.exists(json_file):
+                store.import_json(json_file)
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite user store")
+    parser.add_argument('command', choices=['import'])
+    parser.add_argument('--json', default='users.json')
+    parser.add_argument('--db', default='users.db')
+    args = parser.parse_args()
+
+    store = get_user_store(args.db, json_file="")
+    added = store.import_json(args.json)
+    print(f"Imported {added} account(s) from {args.json}; {store.count()} in {args.db}")
+
+if __name__ == "__main__":
+    main()
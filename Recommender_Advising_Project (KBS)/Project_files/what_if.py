@@ -0,0 +1,135 @@
+"""Incremental "what if" recommendations for one student.
+
+A WhatIfSession keeps the student's eligibility state as bitsets over the
+PrerequisiteGraph. Toggling a course only re-checks the courses whose
+prerequisites reference it, then re-runs the credit fill over the
+currently open courses, and returns what was added to and removed from
+the recommendations:
+
+    session = WhatIfSession('FALL', 3.1, passed, failed)
+    delta = session.set_passed('CSE111', True)
+    delta.added, delta.removed
+
+The recommendations always equal get_course_recommendations for the same
+profile (default first-fit mode).
+"""
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from knowledge_base import KnowledgeBase, get_knowledge_base
+from prerequisite_graph import iter_bits
+
+class WhatIfDelta(NamedTuple):
+    added: List[str]
+    removed: List[str]
+    recommended: List[str]
+    total_credits: int
+
+class WhatIfSession:
+    def __init__(self, semester: str, cgpa: float, passed_courses: Iterable[str],
+                 failed_courses: Iterable[str] = (), kb: KnowledgeBase = None):
+        self.kb = kb if kb is not None else get_knowledge_base()
+        self.semester = semester
+        self.cgpa = cgpa
+        self.credit_limit = self.kb.get_credit_limit(cgpa)
+        graph = self.graph = self.kb.prerequisite_graph
+
+        # Catalog courses offered this semester; the fill considers them in impact order
+        self.offered_mask = 0
+        for code in self.kb.get_semester_courses(semester):
+            if self.kb.get_course_record(code).is_offered(semester):
+                self.offered_mask |= 1 << graph.ids[code]
+        self.credits = [self.kb.get_credit_hours(code) for code in graph.codes[:graph.course_count]]
+
+        self.passed = set(passed_courses)
+        self.passed_mask = graph.mask_of(self.passed)
+        self.prerequisites_met = graph.prerequisites_met(self.passed_mask)
+        self.failed: List[str] = list(failed_courses)
+        self.recommended: List[str] = []
+        self.total_credits = 0
+        self._refill()
+
+    def _refill(self) -> WhatIfDelta:
+        """Re-run the credit fill of get_course_recommendations and diff it against the last one"""
+        graph = self.graph
+        recommended = []
+        total_credits = 0
+        chosen_mask = 0
+        # Failed courses first, latest first, whatever their eligibility
+        for code in list(dict.fromkeys(self.failed))[::-1]:
+            course_credits = self.kb.get_credit_hours(code)
+            if total_credits + course_credits <= self.credit_limit:
+                recommended.append(code)
+                total_credits += course_credits
+                chosen_mask |= graph.mask_of((code,))
+
+        if total_credits < self.credit_limit:
+            taken_mask = self.passed_mask | chosen_mask
+            open_mask = self.offered_mask & self.prerequisites_met & ~self.passed_mask & ~graph.mask_of(self.failed)
+            for course_id in sorted(iter_bits(open_mask), key=self.kb.impact_rank.__getitem__):
+                course_credits = self.credits[course_id]
+                if (total_credits + course_credits <= self.credit_limit and
+                        not graph.corequisite_masks[course_id] & ~taken_mask):
+                    recommended.append(graph.codes[course_id])
+                    total_credits += course_credits
+                    taken_mask |= 1 << course_id
+
+        before = set(self.recommended)
+        after = set(recommended)
+        delta = WhatIfDelta(
+            added=[code for code in recommended if code not in before],
+            removed=[code for code in self.recommended if code not in after],
+            recommended=recommended,
+            total_credits=total_credits,
+        )
+        self.recommended = recommended
+        self.total_credits = total_credits
+        return delta
+
+    def _toggle_passed(self, code: str):
+        """Flip one course's passed state and re-check only the courses that require it"""
+        if code in self.passed:
+            self.passed.discard(code)
+        else:
+            self.passed.add(code)
+        graph = self.graph
+        course_id = graph.ids.get(code)
+        if course_id is None:
+            return
+        self.passed_mask ^= 1 << course_id
+        for dependent in iter_bits(graph.dependent_masks[course_id]):
+            if graph.prerequisite_masks[dependent] & ~self.passed_mask:
+                self.prerequisites_met &= ~(1 << dependent)
+            else:
+                self.prerequisites_met |= 1 << dependent
+
+    def set_passed(self, code: str, passed: bool) -> WhatIfDelta:
+        """Mark a course as passed (or not) and return the change in recommendations"""
+        if passed != (code in self.passed):
+            self._toggle_passed(code)
+        return self._refill()
+
+    def set_failed(self, code: str, failed: bool) -> WhatIfDelta:
+        """Add a failed course (as the most recent one) or remove it"""
+        if failed:
+            if code not in self.failed:
+                self.failed.append(code)
+        else:
+            self.failed = [c for c in self.failed if c != code]
+        return self._refill()
+
+    def update(self, passed_courses: Iterable[str], failed_courses: Iterable[str]) -> WhatIfDelta:
+        """Move to new passed/failed selections (e.g. multiselect values), touching only what changed"""
+        for code in self.passed ^ set(passed_courses):
+            self._toggle_passed(code)
+        self.failed = list(failed_courses)
+        return self._refill()
+
+    def result(self) -> Tuple[List[str], Dict, int]:
+        """Current recommendations in the get_course_recommendations format, explanations included"""
+        from explanation_system import ExplanationSystem
+
+        failed = set(self.failed)
+        current = set(self.recommended)
+        explanations = ExplanationSystem(self.kb).get_detailed_recommendations_explanation(
+            self.recommended, self.semester, self.cgpa, set(self.passed), failed, current)
+        return list(self.recommended), explanations, self.total_credits